@@ -7,13 +7,16 @@ both single-channel and multi-channel data.
 
 Functions:
 - compute_fft(data, fs): Computes the FFT and PSD of the provided data.
+- compute_fft_batch(data, fs, axis, single_precision, workers): Computes the one-sided FFT PSD of multi-channel or epoched data in a single batched real FFT.
+- stream_sliding_dft(blocks, fs, window_size, frequencies, resync_every): Keeps the DFT of tracked frequency bins up to date from a stream of multi-channel sample blocks.
+- draw_psd(ax, frequencies, psd, channel_name): Draws the Power Spectral Density on the given axes.
 - plot_psd(frequencies, psd, channel_name): Plots the Power Spectral Density.
-- process_eeg_data(eeg_data, fs): Processes data to calculate and plot FFT PSD for each channel.
+- process_eeg_data(eeg_data, fs, output_dir, montage, n_jobs): Processes data to calculate and plot FFT PSD for each channel, optionally rendering headless to files.
 
 Example Usage:
 ---------------
 import numpy as np
-from FFT import compute_fft, plot_psd, process_eeg_data
+from FFT import compute_fft, compute_fft_batch, stream_sliding_dft, plot_psd, process_eeg_data
 
 # Example for single-channel data
 single_channel_data = np.random.rand(1000)  # Example data
@@ -25,6 +28,18 @@ plot_psd(frequencies, psd, channel_name='Channel 1')
 multi_channel_data = np.random.rand(5, 1000)  # 5 channels, example data
 process_eeg_data(multi_channel_data, fs)
 
+# Headless: save one montage per recording instead of showing figures
+frequencies, psd = process_eeg_data(multi_channel_data, fs, output_dir='/path/to/save/plots', montage=True)
+
+# Example for epoched data (epochs x channels x samples) in single precision
+epoched_data = np.random.rand(20, 5, 1000)
+frequencies, psd = compute_fft_batch(epoched_data, fs, single_precision=True)
+
+# Streaming: sliding DFT of selected bins over a 1 s window, updated every 50 ms block
+blocks = (np.random.rand(64, 50) for _ in range(1000))  # e.g. a generator reading the acquisition ring buffer
+for tracked_frequencies, psd in stream_sliding_dft(blocks, fs=1000, window_size=1000, frequencies=[8, 9, 10, 11, 12]):
+    alpha_power = psd.sum(axis=-1)
+
 Note:
 -----
 The module is designed with EEG data analysis in mind but can be used for other
@@ -32,9 +47,14 @@ types of time series data as well. Ensure that the sampling frequency (fs) is
 appropriately set for your specific data.
 """
 
+from functools import lru_cache
+
 import numpy as np
+import scipy.fft
 import matplotlib.pyplot as plt
 
+from batch_rendering.batch_rendering import render_panels
+
 
 def compute_fft(data, fs):
     """
@@ -57,6 +77,141 @@ def compute_fft(data, fs):
     frequencies = np.fft.fftfreq(len(psd), d=1/fs)
     return frequencies, psd
 
+@lru_cache(maxsize=32)
+def _rfft_frequencies(n, fs):
+    """
+    Return the (read-only) one-sided frequency grid for an n-point real FFT.
+    """
+    frequencies = scipy.fft.rfftfreq(n, d=1/fs)
+    frequencies.setflags(write=False)
+    return frequencies
+
+def compute_fft_batch(data, fs, axis=-1, single_precision=False, workers=-1):
+    """
+    Compute the one-sided FFT and PSD of multi-channel data in a single batched transform.
+
+    The data may be one-dimensional, (channels x samples) or
+    (epochs x channels x samples); the real FFT is taken along `axis` for all
+    channels at once. Because the input is real, only the non-negative
+    frequencies are computed, which halves the work and memory of a full
+    complex FFT. scipy.fft keeps a cache of FFT plans, so repeated calls with
+    the same shape reuse the same plan.
+
+    Parameters:
+    data : array_like
+        Time series data with time along `axis`.
+    fs : float
+        Sampling frequency of the data.
+    axis : int, optional
+        Axis holding the time samples (default: last axis).
+    single_precision : bool, optional
+        If True, compute in float32/complex64 and return a float32 PSD.
+    workers : int, optional
+        Number of workers passed to scipy.fft (-1 uses all CPU cores).
+
+    Returns:
+    frequencies : ndarray
+        Non-negative frequencies corresponding to the PSD.
+    psd : ndarray
+        Power spectral density of the data, with the time axis replaced by
+        the frequency axis. Matches the non-negative half of compute_fft.
+    """
+    dtype = np.float32 if single_precision else np.float64
+    data = np.asarray(data, dtype=dtype)
+    n = data.shape[axis]
+    fft_result = scipy.fft.rfft(data, axis=axis, workers=workers)
+    psd = fft_result.real ** 2 + fft_result.imag ** 2
+    frequencies = _rfft_frequencies(n, float(fs))
+    return frequencies, psd
+
+def stream_sliding_dft(blocks, fs, window_size, frequencies, resync_every=1000):
+    """
+    Keep the DFT of tracked frequency bins up to date from a stream of sample blocks.
+
+    This is a sliding DFT: for every tracked bin k of a window_size-point DFT,
+    each new sample x[n] updates the coefficient as
+    X_k[n] = (X_k[n-1] + x[n] - x[n-N]) * exp(2j*pi*k/N).
+    The update for a whole block is applied at once as one matrix product, so
+    the cost per block is proportional to the block length and the number of
+    tracked bins, not to the window length.
+
+    Parameters:
+    blocks : iterable of array_like
+        Blocks of samples, each one-dimensional or (channels x block samples),
+        e.g. a generator reading an acquisition ring buffer. Blocks of a
+        fixed length reuse the same precomputed update matrix.
+    fs : float
+        Sampling frequency of the data.
+    window_size : int
+        Length N of the sliding window in samples.
+    frequencies : array_like
+        Frequencies to track; each is rounded to the nearest bin of the
+        N-point DFT.
+    resync_every : int or None, optional
+        Recompute the tracked coefficients exactly from the window every
+        resync_every blocks, so the rounding error of the recursive update
+        stays bounded on long streams. Each resync costs about as much as
+        window_size samples of updates. None never resyncs, and the error
+        then grows with the length of the stream.
+
+    Yields:
+    tracked_frequencies : ndarray
+        Frequencies of the tracked bins.
+    psd : ndarray
+        Power |X_k|**2 of each tracked bin over the most recent window
+        (channels x tracked bins), matching compute_fft on that window. Until
+        window_size samples have been received, missing samples count as zeros.
+    """
+    bins = np.round(np.asarray(frequencies, dtype=float) * window_size / fs).astype(int)
+    tracked_frequencies = bins * fs / window_size
+    window_twiddles = np.exp(-2j * np.pi * np.outer(np.arange(window_size), bins) / window_size)
+
+    buffer = None
+    coefficients = None
+    block_twiddles = None
+
+    for block_index, block in enumerate(blocks):
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        block_size = block.shape[-1]
+        if buffer is None:
+            buffer = np.zeros((block.shape[0], window_size))
+            coefficients = np.zeros((block.shape[0], bins.size), dtype=complex)
+        if block_twiddles is None or block_twiddles.shape[0] != block_size:
+            # Sample b of a block is rotated by the (block_size - b) sample steps that follow it
+            block_twiddles = np.exp(2j * np.pi * np.outer(block_size - np.arange(block_size), bins) / window_size)
+            block_rotation = np.exp(2j * np.pi * bins * block_size / window_size)
+
+        history = np.concatenate((buffer, block), axis=-1)
+        difference = history[:, window_size:] - history[:, :block_size]
+        coefficients = coefficients * block_rotation + difference @ block_twiddles
+        buffer = history[:, -window_size:]
+
+        if resync_every and (block_index + 1) % resync_every == 0:
+            coefficients = buffer @ window_twiddles
+
+        yield tracked_frequencies, coefficients.real ** 2 + coefficients.imag ** 2
+
+def draw_psd(ax, frequencies, psd, channel_name=None):
+    """
+    Draw the Power Spectral Density on the given axes.
+
+    Parameters:
+    ax : matplotlib.axes.Axes
+        Axes to draw on.
+    frequencies : ndarray
+        Frequencies corresponding to the PSD.
+    psd : ndarray
+        Power spectral density of the data.
+    channel_name : str, optional
+        Name of the channel (for title).
+    """
+    ax.semilogy(frequencies, psd)
+    if channel_name:
+        ax.set_title(f'PSD for Channel {channel_name}')
+    ax.set_xlabel('Frequency [Hz]')
+    ax.set_ylabel('PSD [V**2]')
+    ax.grid(True)
+
 def plot_psd(frequencies, psd, channel_name=None):
     """
     Plot the Power Spectral Density.
@@ -70,16 +225,11 @@ def plot_psd(frequencies, psd, channel_name=None):
         Name of the channel (for title).
     """
     plt.figure()
-    plt.semilogy(frequencies, psd)
-    if channel_name:
-        plt.title(f'PSD for Channel {channel_name}')
-    plt.xlabel('Frequency [Hz]')
-    plt.ylabel('PSD [V**2]')
-    plt.grid(True)
+    draw_psd(plt.gca(), frequencies, psd, channel_name)
     plt.show()
 
 # Example usage of the library functions
-def process_eeg_data(eeg_data, fs):
+def process_eeg_data(eeg_data, fs, output_dir=None, montage=False, n_jobs=None):
     """
     Process EEG data to calculate and plot FFT PSD for each channel.
 
@@ -89,14 +239,34 @@ def process_eeg_data(eeg_data, fs):
         or two-dimensional (multi-channel, with channels as rows).
     fs : float
         Sampling frequency of the EEG data.
+    output_dir : str, optional
+        If given, figures are rendered headless (Agg) to this directory
+        instead of being shown.
+    montage : bool, optional
+        With output_dir, save one multi-panel montage instead of one image per channel.
+    n_jobs : int, optional
+        With output_dir, number of rendering workers (default: the package executor).
+
+    Returns:
+    frequencies : ndarray
+        Non-negative frequencies of the PSD.
+    psd : ndarray
+        Power spectral density of each channel (channels x frequencies).
     """
     if eeg_data.ndim == 1:
         eeg_data = np.expand_dims(eeg_data, axis=0)  # Convert 1D to 2D for consistency
 
     num_channels = eeg_data.shape[0]
 
-    for i in range(num_channels):
-        channel_data = eeg_data[i, :]
-        frequencies, psd = compute_fft(channel_data, fs)
-        plot_psd(frequencies, psd, channel_name=f'Channel {i+1}')
+    # One batched real FFT for all channels instead of one complex FFT per channel
+    frequencies, psd = compute_fft_batch(eeg_data, fs)
+
+    if output_dir is not None:
+        panels = [(frequencies, psd[i], f'Channel {i+1}') for i in range(num_channels)]
+        render_panels(draw_psd, panels, output_dir, 'fft_psd', montage=montage, n_jobs=n_jobs)
+    else:
+        for i in range(num_channels):
+            plot_psd(frequencies, psd[i], channel_name=f'Channel {i+1}')
+
+    return frequencies, psd
 
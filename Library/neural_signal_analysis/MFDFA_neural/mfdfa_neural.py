@@ -4,13 +4,24 @@ Multifractal Detrended Fluctuation Analysis (MFDFA) Module for EEG Data
 This module provides functions to perform MFDFA on EEG data, suitable for both single-channel and multi-channel analysis.
 
 Functions:
-- calculate_mfdfa(eeg_data, lag, q, channels): Calculates MFDFA for each EEG channel.
-- plot_mfdfa_results(eeg_data, mfdfa_results): Plots EEG signals and their MFDFA results.
+- calculate_mfdfa(eeg_data, lag, q, channels, order): Calculates MFDFA for each EEG channel.
+- compute_segment_variances(eeg_data, lag, order): Computes the detrended variance of every segment at every scale for all channels; independent of q.
+- fluctuation_from_variances(variances, offsets, q): Computes the fluctuation functions for any q-values from stored segment variances.
+- save_segment_variances(path, scales, variances, offsets, order): Saves segment variances to a .npz file.
+- load_segment_variances(path): Loads segment variances saved with save_segment_variances.
+- calculate_mfdfa_batch(eeg_data, lag, q, order): Calculates the MFDFA fluctuation functions of all channels at once as a (channels x scales x q) array.
+- generalized_hurst(scales, fluct): Estimates the generalized Hurst exponents h(q).
+- mass_exponents(q, h): Computes the mass exponents tau(q).
+- singularity_spectrum(q, tau): Computes the singularity spectrum f(alpha) by a Legendre transform.
+- draw_mfdfa(ax_signal, ax_fluct, signal, channel_name, scale, fluct): Draws one channel's EEG signal and MFDFA result on the given axes.
+- plot_mfdfa_results(eeg_data, mfdfa_results, output_dir, montage, n_jobs): Plots EEG signals and their MFDFA results, optionally rendering headless to files.
 
 Example Usage:
 ---------------
 import numpy as np
-from mfdfa_neural import calculate_mfdfa, plot_mfdfa_results
+from mfdfa_neural import (calculate_mfdfa, calculate_mfdfa_batch, compute_segment_variances,
+                          fluctuation_from_variances, generalized_hurst, mass_exponents,
+                          singularity_spectrum, plot_mfdfa_results)
 
 # Sample EEG data (5 channels x 1000 data points)
 eeg_data = np.random.rand(5, 1000)
@@ -24,16 +35,280 @@ mfdfa_results = calculate_mfdfa(eeg_data, lags, qs, channel_names)
 # Plot results
 plot_mfdfa_results(eeg_data, mfdfa_results)
 
+# Fluctuation functions of all channels as one array (channels x scales x q)
+scales, fluct = calculate_mfdfa_batch(eeg_data, lags, qs, order=1)
+
+# Detrend once, then refine the q grid and derive h(q), tau(q) and f(alpha) cheaply
+scales, variances, offsets = compute_segment_variances(eeg_data, lags, order=1)
+fine_qs = np.linspace(-10, 10, 401)
+fluct = fluctuation_from_variances(variances, offsets, fine_qs)
+h = generalized_hurst(scales, fluct)
+tau = mass_exponents(fine_qs, h)
+alpha, f_alpha = singularity_spectrum(fine_qs, tau)
+
+# Headless: save one montage per recording
+plot_mfdfa_results(eeg_data, mfdfa_results, output_dir='/path/to/save/plots', montage=True)
+
 Note:
 -----
 Ensure the EEG data is properly preprocessed and the 'lags' and 'qs' parameters are appropriately chosen for your analysis.
 """
 
+from functools import lru_cache
+
 import numpy as np
-from MFDFA import MFDFA
 import matplotlib.pyplot as plt
 
-def calculate_mfdfa(eeg_data, lag, q, channels=None):
+from batch_rendering.batch_rendering import render_panels
+
+@lru_cache(maxsize=256)
+def _detrending_basis(scale, order):
+    """
+    Return a (read-only) orthonormal basis of the polynomials of the given
+    order sampled on a segment of `scale` points.
+
+    Projecting a segment onto this basis gives its least-squares polynomial
+    trend, so no per-segment fit is needed.
+    """
+    x = np.linspace(-1, 1, scale)
+    basis, _ = np.linalg.qr(np.vander(x, order + 1))
+    basis.setflags(write=False)
+    return basis
+
+def compute_segment_variances(eeg_data, lag, order=1):
+    """
+    Compute the detrended variance of every segment at every scale.
+
+    This is the expensive part of MFDFA and does not depend on q, so it can
+    be kept (or saved with save_segment_variances) and reused for any set of
+    q-values with fluctuation_from_variances.
+
+    The profiles (cumulative sums of the mean-removed signals) of all
+    channels are built in one step. At each scale the profiles are cut into
+    non-overlapping segments from the start and from the end of the record,
+    and every segment of every channel is detrended by projecting it onto a
+    precomputed orthonormal polynomial basis, as in the MFDFA package.
+
+    Parameters:
+    eeg_data : np.ndarray
+        The EEG data array (channels x time series data), or one-dimensional.
+    lag : np.ndarray
+        Array of lags (segment lengths). Lags are rounded to integers,
+        duplicates are removed, and lags not greater than order + 1 or longer
+        than the record are dropped.
+    order : int, optional
+        Order of the detrending polynomial (default: 1).
+
+    Returns:
+    scales : np.ndarray
+        Lags used, as integers.
+    variances : np.ndarray
+        Residual variance of each segment (channels x segments), with the
+        segments of all scales concatenated in the order of `scales`.
+    offsets : np.ndarray
+        Index of the first segment of each scale along the segment axis.
+    """
+    eeg_data = np.atleast_2d(np.asarray(eeg_data, dtype=float))
+    num_channels, N = eeg_data.shape
+
+    scales = np.unique(np.round(np.asarray(lag)).astype(int))
+    scales = scales[(scales > order + 1) & (scales <= N)]
+
+    num_segments = 2 * (N // scales)
+    offsets = np.concatenate(([0], np.cumsum(num_segments)[:-1]))
+
+    profile = np.cumsum(eeg_data - eeg_data.mean(axis=-1, keepdims=True), axis=-1)
+    variances = np.empty((num_channels, num_segments.sum()))
+
+    for j, scale in enumerate(scales):
+        half = num_segments[j] // 2
+        covered = half * scale
+        # Segments from the start and from the end, so that no samples are left out
+        segments = np.concatenate((profile[:, :covered].reshape(num_channels * half, scale),
+                                   profile[:, N - covered:].reshape(num_channels * half, scale)))
+
+        # One matrix product detrends every segment of every channel
+        basis = _detrending_basis(scale, order)
+        residuals = segments - (segments @ basis) @ basis.T
+        # The basis contains the constant, so the residuals have zero mean
+        scale_variances = np.einsum('ij,ij->i', residuals, residuals) / scale
+        variances[:, offsets[j]:offsets[j] + num_segments[j]] = (
+            scale_variances.reshape(2, num_channels, half).transpose(1, 0, 2).reshape(num_channels, 2 * half))
+
+    return scales, variances, offsets
+
+def fluctuation_from_variances(variances, offsets, q):
+    """
+    Compute the q-order fluctuation functions from segment variances.
+
+    For each scale and q this is the power mean (mean(F^q))^(1/q) of the
+    segment fluctuations F, with F^2 the segment variances (the logarithmic
+    average for q = 0). The means are taken in the log domain, shifted by the
+    largest term, to avoid overflow for large |q|.
+
+    Parameters:
+    variances : np.ndarray
+        Segment variances (channels x segments), from compute_segment_variances.
+    offsets : np.ndarray
+        Index of the first segment of each scale, from compute_segment_variances.
+    q : np.ndarray
+        Array of q-values.
+
+    Returns:
+    fluct : np.ndarray
+        Fluctuation functions (channels x scales x q).
+    """
+    variances = np.atleast_2d(variances)
+    q = np.atleast_1d(np.asarray(q, dtype=float))
+    offsets = np.asarray(offsets)
+    counts = np.diff(np.append(offsets, variances.shape[-1]))
+
+    fluct = np.empty(variances.shape[:-1] + (offsets.size, q.size))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_variances = np.log(variances)
+        # Log variances relative to the largest and smallest of their scale; the
+        # largest term of the power mean is at one of the two, depending on the sign of q
+        log_max = np.maximum.reduceat(log_variances, offsets, axis=-1)
+        log_min = np.minimum.reduceat(log_variances, offsets, axis=-1)
+        log_max[~np.isfinite(log_max)] = 0
+        log_min[~np.isfinite(log_min)] = 0
+        below_max = log_variances - np.repeat(log_max, counts, axis=-1)
+        above_min = log_variances - np.repeat(log_min, counts, axis=-1)
+    exponents = np.empty_like(log_variances)
+
+    for i, q_value in enumerate(q):
+        if q_value == 0:
+            fluct[..., i] = np.exp(0.5 * np.add.reduceat(log_variances, offsets, axis=-1) / counts)
+            continue
+        # Power mean in the log domain, shifted by the largest term to avoid overflow for large |q|
+        if q_value > 0:
+            np.multiply(below_max, q_value / 2, out=exponents)
+            shift = (q_value / 2) * log_max
+        else:
+            np.multiply(above_min, q_value / 2, out=exponents)
+            shift = (q_value / 2) * log_min
+        np.exp(exponents, out=exponents)
+        log_mean = shift + np.log(np.add.reduceat(exponents, offsets, axis=-1) / counts)
+        fluct[..., i] = np.exp(log_mean / q_value)
+
+    return fluct
+
+def save_segment_variances(path, scales, variances, offsets, order=1):
+    """
+    Save segment variances to a .npz file for later q-grid refinement.
+
+    Parameters:
+    path : str
+        Path of the .npz file.
+    scales, variances, offsets : np.ndarray
+        Output of compute_segment_variances.
+    order : int, optional
+        Order of the detrending polynomial used, stored for reference.
+    """
+    np.savez(path, scales=scales, variances=variances, offsets=offsets, order=order)
+
+def load_segment_variances(path):
+    """
+    Load segment variances saved with save_segment_variances.
+
+    Parameters:
+    path : str
+        Path of the .npz file.
+
+    Returns:
+    scales, variances, offsets : np.ndarray
+        As returned by compute_segment_variances.
+    """
+    with np.load(path) as stored:
+        return stored['scales'], stored['variances'], stored['offsets']
+
+def calculate_mfdfa_batch(eeg_data, lag, q, order=1):
+    """
+    Calculate the MFDFA fluctuation functions of all channels at once.
+
+    Combines compute_segment_variances and fluctuation_from_variances; use
+    those directly to evaluate several q grids from one detrending pass.
+
+    Parameters:
+    eeg_data : np.ndarray
+        The EEG data array (channels x time series data), or one-dimensional.
+    lag : np.ndarray
+        Array of lags (segment lengths), see compute_segment_variances.
+    q : np.ndarray
+        Array of q-values. q = 0 uses the logarithmic average.
+    order : int, optional
+        Order of the detrending polynomial (default: 1).
+
+    Returns:
+    scales : np.ndarray
+        Lags used, as integers.
+    fluct : np.ndarray
+        Fluctuation functions (channels x scales x q).
+    """
+    scales, variances, offsets = compute_segment_variances(eeg_data, lag, order=order)
+    return scales, fluctuation_from_variances(variances, offsets, q)
+
+def generalized_hurst(scales, fluct):
+    """
+    Estimate the generalized Hurst exponents h(q) from fluctuation functions.
+
+    h(q) is the least-squares slope of log F_q(s) against log s.
+
+    Parameters:
+    scales : np.ndarray
+        Lags used.
+    fluct : np.ndarray
+        Fluctuation functions (... x scales x q).
+
+    Returns:
+    h : np.ndarray
+        Generalized Hurst exponents (... x q).
+    """
+    log_scales = np.log(scales)
+    log_scales = log_scales - log_scales.mean()
+    return np.einsum('s,...sq->...q', log_scales, np.log(fluct)) / (log_scales @ log_scales)
+
+def mass_exponents(q, h):
+    """
+    Compute the mass exponents tau(q) = q h(q) - 1.
+
+    Parameters:
+    q : np.ndarray
+        Array of q-values.
+    h : np.ndarray
+        Generalized Hurst exponents (... x q).
+
+    Returns:
+    tau : np.ndarray
+        Mass exponents (... x q).
+    """
+    return np.asarray(q) * h - 1
+
+def singularity_spectrum(q, tau):
+    """
+    Compute the singularity spectrum f(alpha) by a Legendre transform of tau(q).
+
+    alpha = d tau / d q (by finite differences over the q grid) and
+    f(alpha) = q alpha - tau(q).
+
+    Parameters:
+    q : np.ndarray
+        Array of q-values, in increasing order.
+    tau : np.ndarray
+        Mass exponents (... x q).
+
+    Returns:
+    alpha : np.ndarray
+        Singularity strengths (... x q).
+    f_alpha : np.ndarray
+        Singularity spectrum (... x q).
+    """
+    q = np.asarray(q, dtype=float)
+    alpha = np.gradient(tau, q, axis=-1)
+    f_alpha = q * alpha - tau
+    return alpha, f_alpha
+
+def calculate_mfdfa(eeg_data, lag, q, channels=None, order=1):
     """
     Calculate the Multifractal Detrended Fluctuation Analysis (MFDFA) for EEG data.
 
@@ -46,6 +321,8 @@ def calculate_mfdfa(eeg_data, lag, q, channels=None):
         Array of q-values.
     channels : list, optional
         List of channel names.
+    order : int, optional
+        Order of the detrending polynomial (default: 1).
 
     Returns:
     List of tuples containing (channel_name, scale, fluctuation) for each channel.
@@ -54,15 +331,38 @@ def calculate_mfdfa(eeg_data, lag, q, channels=None):
     num_channels = eeg_data.shape[0]
     mfdfa_results = []
 
+    # All channels in one pass of the built-in engine
+    scale, fluct = calculate_mfdfa_batch(eeg_data, lag, q, order=order)
+
     for ch in range(num_channels):
-        eeg_data_filtered = eeg_data[ch, :]
-        scale, fluct = MFDFA(eeg_data_filtered, lag=lag, q=q)
         channel_name = channels[ch] if channels else f"Channel {ch+1}"
-        mfdfa_results.append((channel_name, scale, fluct))
+        mfdfa_results.append((channel_name, scale, fluct[ch]))
 
     return mfdfa_results
 
-def plot_mfdfa_results(eeg_data, mfdfa_results):
+def draw_mfdfa(ax_signal, ax_fluct, signal, channel_name, scale, fluct):
+    """
+    Draw one channel's EEG signal and MFDFA result on the given axes.
+
+    Parameters:
+    ax_signal, ax_fluct : matplotlib.axes.Axes
+        Axes for the EEG signal and for the fluctuation function.
+    signal : np.ndarray
+        EEG signal of the channel.
+    channel_name : str
+        Name of the channel.
+    scale : np.ndarray
+        Scales (lags) of the MFDFA.
+    fluct : np.ndarray
+        Fluctuation function of the channel.
+    """
+    ax_signal.plot(signal)
+    ax_signal.set_title(f"{channel_name} - EEG Signal")
+
+    ax_fluct.loglog(scale, fluct)
+    ax_fluct.set_title(f"{channel_name} - Multifractal DFA")
+
+def plot_mfdfa_results(eeg_data, mfdfa_results, output_dir=None, montage=False, n_jobs=None):
     """
     Plot the MFDFA results for each EEG channel.
 
@@ -71,17 +371,27 @@ def plot_mfdfa_results(eeg_data, mfdfa_results):
         The EEG data array (channels x time series data).
     mfdfa_results : list
         List of tuples containing (channel_name, scale, fluctuation) for each channel.
+    output_dir : str, optional
+        If given, figures are rendered headless (Agg) to this directory
+        instead of being shown.
+    montage : bool, optional
+        With output_dir, save one multi-panel montage instead of one image per channel.
+    n_jobs : int, optional
+        With output_dir, number of rendering workers (default: the package executor).
     """
+    if output_dir is not None:
+        panels = [(eeg_data[ch, :], channel_name, scale, fluct)
+                  for ch, (channel_name, scale, fluct) in enumerate(mfdfa_results)]
+        render_panels(draw_mfdfa, panels, output_dir, 'mfdfa', montage=montage, n_jobs=n_jobs,
+                      figsize=(12, 4), axes_per_panel=2)
+        return
+
     for ch, (channel_name, scale, fluct) in enumerate(mfdfa_results):
         plt.figure(figsize=(12, 4))
         
-        plt.subplot(1, 2, 1)
-        plt.plot(eeg_data[ch, :])
-        plt.title(f"{channel_name} - EEG Signal")
-        
-        plt.subplot(1, 2, 2)
-        plt.loglog(scale, fluct)
-        plt.title(f"{channel_name} - Multifractal DFA")
+        ax_signal = plt.subplot(1, 2, 1)
+        ax_fluct = plt.subplot(1, 2, 2)
+        draw_mfdfa(ax_signal, ax_fluct, eeg_data[ch, :], channel_name, scale, fluct)
         
         plt.tight_layout()
         plt.show()
@@ -5,13 +5,18 @@ This module provides functions for computing and visualizing the Short-Time Four
 
 Functions:
 - compute_stft(data, fs, window_size): Computes the STFT of the provided data.
+- compute_stft_power(eeg_data, fs, window_size, noverlap, scaling, out, out_path, chunk_frames): Computes the float32 STFT magnitude or power of all channels in time chunks, writing into a preallocated or memory-mapped array.
+- draw_stft(ax, frequencies, time_intervals, stft_data, channel_name): Draws the STFT heatmap of a channel on the given axes.
 - plot_stft(frequencies, time_intervals, stft_data, channel_name): Plots the STFT as a heatmap for a given channel.
-- process_eeg_data(eeg_data, fs, window_size): Processes EEG data to calculate and plot STFT for each channel.
+- build_stft_pyramid(stft_power, frequencies, time_intervals, pyramid_dir, pooling, factor, scaling, min_frames, chunk_frames): Builds an on-disk multi-resolution spectrogram pyramid with max- or mean-pooled levels.
+- load_stft_pyramid_level(pyramid_dir, width_px, time_range): Loads the pyramid level that matches an output pixel width.
+- plot_stft_pyramid(pyramid_dir, channel, width_px, time_range, channel_name): Plots a channel's spectrogram from the matching pyramid level.
+- process_eeg_data(eeg_data, fs, window_size, output_dir, montage, n_jobs): Processes EEG data to calculate and plot STFT for each channel, optionally rendering headless to files.
 
 Example Usage:
 ---------------
 import numpy as np
-from STFT_signal import process_eeg_data
+from STFT_signal import process_eeg_data, compute_stft_power, build_stft_pyramid, plot_stft_pyramid
 
 # Sample EEG data (3 channels x 1000 data points)
 eeg_data = np.random.rand(3, 1000)
@@ -21,14 +26,32 @@ window_size = 128  # Segment length for STFT in samples
 # Process EEG data and plot STFT
 process_eeg_data(eeg_data, fs, window_size)
 
+# Headless: save one montage per recording and keep the numeric results
+frequencies, time_intervals, stft_data = process_eeg_data(eeg_data, fs, window_size, output_dir='/path/to/save/plots', montage=True)
+
+# Long recordings: float32 log-power spectrogram (channels x freqs x frames) written to a memory-mapped .npy file
+long_data = np.load('/path/to/recording.npy', mmap_mode='r')
+frequencies, time_intervals, log_power = compute_stft_power(long_data, fs, window_size, scaling='db', out_path='/path/to/spectrogram.npy')
+
+# Hours-long spectrograms: build a max-pooled pyramid once, then plot at screen resolution
+frequencies, time_intervals, power = compute_stft_power(long_data, fs, window_size, out_path='/path/to/spectrogram.npy')
+build_stft_pyramid(power, frequencies, time_intervals, '/path/to/pyramid', pooling='max')
+plot_stft_pyramid('/path/to/pyramid', channel=0, width_px=1920, time_range=(600, 1200))
+
 Note:
 -----
 STFT is a powerful method for analyzing the frequency content of signals over time, making it highly suitable for EEG signal analysis.
 """
 
+import json
+import os
+
 import numpy as np
+import scipy.fft
 import matplotlib.pyplot as plt
-from scipy.signal import stft
+from scipy.signal import stft, get_window
+
+from batch_rendering.batch_rendering import render_panels
 
 def compute_stft(data, fs, window_size):
     """
@@ -36,7 +59,8 @@ def compute_stft(data, fs, window_size):
 
     Parameters:
     data : array_like
-        One-dimensional time series data.
+        Time series data with time along the last axis, either one-dimensional
+        or (channels x time series data).
     fs : float
         Sampling frequency of the data.
     window_size : int
@@ -53,6 +77,114 @@ def compute_stft(data, fs, window_size):
     frequencies, time_intervals, stft_data = stft(data, fs=fs, nperseg=window_size)
     return frequencies, time_intervals, stft_data
 
+def compute_stft_power(eeg_data, fs, window_size, noverlap=None, scaling='power', out=None, out_path=None, chunk_frames=1024):
+    """
+    Compute the STFT magnitude or power of all channels in time chunks.
+
+    Frames are processed in chunks of overlapping samples, so peak memory is
+    bounded by chunk_frames regardless of the recording length, and only the
+    float32 magnitude or power is kept instead of the complex128 STFT. The
+    frames, frequencies and scaling are the same as compute_stft (scipy's
+    stft with a Hann window, zero boundary extension and zero padding).
+
+    Parameters:
+    eeg_data : array_like
+        EEG data (channels x time series data), e.g. a memory-mapped array.
+    fs : float
+        Sampling frequency of the EEG data.
+    window_size : int
+        Size of each segment for STFT in samples.
+    noverlap : int, optional
+        Number of samples shared by consecutive segments (default: window_size // 2).
+    scaling : str, optional
+        'magnitude' for |STFT|, 'power' for |STFT|**2 or 'db' for 10 * log10(|STFT|**2).
+    out : ndarray, optional
+        Preallocated float32 output array (channels x freqs x frames).
+    out_path : str, optional
+        If given (and out is None), the output is created as a memory-mapped
+        .npy file at this path.
+    chunk_frames : int, optional
+        Number of frames computed per chunk.
+
+    Returns:
+    frequencies : ndarray
+        Frequencies corresponding to the STFT.
+    time_intervals : ndarray
+        Time intervals of the STFT.
+    stft_power : ndarray
+        STFT magnitude or power of each channel (channels x freqs x frames).
+    """
+    if scaling not in ('magnitude', 'power', 'db'):
+        raise ValueError(f"Unknown scaling '{scaling}', expected 'magnitude', 'power' or 'db'")
+    if np.ndim(eeg_data) == 1:
+        eeg_data = np.asarray(eeg_data)[np.newaxis, :]
+
+    if noverlap is None:
+        noverlap = window_size // 2
+    step = window_size - noverlap
+    num_channels, num_samples = eeg_data.shape
+
+    # Same frame layout as scipy's stft: window_size // 2 zeros on both sides,
+    # then zero padding so that the last frame is complete
+    pad_left = window_size // 2
+    extended_length = num_samples + 2 * pad_left
+    extended_length += (-(extended_length - window_size) % step) % window_size
+    num_frames = (extended_length - window_size) // step + 1
+
+    window = get_window('hann', window_size).astype(np.float32)
+    window_scale = np.float32(1 / window.sum())
+    frequencies = scipy.fft.rfftfreq(window_size, d=1/fs)
+    time_intervals = np.arange(num_frames) * step / fs
+
+    shape = (num_channels, len(frequencies), num_frames)
+    if out is None:
+        if out_path is not None:
+            out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=shape)
+        else:
+            out = np.empty(shape, dtype=np.float32)
+
+    for first in range(0, num_frames, chunk_frames):
+        last = min(first + chunk_frames, num_frames)
+        start = first * step - pad_left
+        stop = (last - 1) * step + window_size - pad_left
+        chunk = np.zeros((num_channels, stop - start), dtype=np.float32)
+        chunk[:, max(-start, 0):min(stop, num_samples) - start] = eeg_data[:, max(start, 0):min(stop, num_samples)]
+
+        segments = np.lib.stride_tricks.sliding_window_view(chunk, window_size, axis=-1)[:, ::step, :]
+        spectrum = scipy.fft.rfft(segments * window, axis=-1) * window_scale
+        if scaling == 'magnitude':
+            values = np.abs(spectrum)
+        else:
+            values = spectrum.real ** 2 + spectrum.imag ** 2
+            if scaling == 'db':
+                values = 10 * np.log10(values)
+        out[:, :, first:last] = values.transpose(0, 2, 1)
+
+    return frequencies, time_intervals, out
+
+def draw_stft(ax, frequencies, time_intervals, stft_data, channel_name=None):
+    """
+    Draw the STFT as a heatmap on the given axes.
+
+    Parameters:
+    ax : matplotlib.axes.Axes
+        Axes to draw on.
+    frequencies : ndarray
+        Frequencies corresponding to the STFT.
+    time_intervals : ndarray
+        Time intervals of the STFT.
+    stft_data : ndarray
+        STFT of the data.
+    channel_name : str, optional
+        Name of the channel (for title).
+    """
+    image = ax.imshow(10 * np.log10(np.abs(stft_data)), aspect='auto', cmap='inferno', extent=[time_intervals[0], time_intervals[-1], frequencies[-1], frequencies[0]])
+    if channel_name:
+        ax.set_title(f'STFT for Channel {channel_name}')
+    ax.set_xlabel('Time [s]')
+    ax.set_ylabel('Frequency [Hz]')
+    ax.figure.colorbar(image, ax=ax, label='Power/Frequency [dB/Hz]')
+
 def plot_stft(frequencies, time_intervals, stft_data, channel_name=None):
     """
     Plot the STFT as a heatmap.
@@ -68,7 +200,207 @@ def plot_stft(frequencies, time_intervals, stft_data, channel_name=None):
         Name of the channel (for title).
     """
     plt.figure()
-    plt.imshow(10 * np.log10(np.abs(stft_data)), aspect='auto', cmap='inferno', extent=[time_intervals[0], time_intervals[-1], frequencies[-1], frequencies[0]])
+    draw_stft(plt.gca(), frequencies, time_intervals, stft_data, channel_name)
+    plt.show()
+
+def _pool_axis(values, factor, axis, pooling):
+    """
+    Pool groups of `factor` consecutive entries along an axis; a shorter
+    trailing group is pooled on its own.
+    """
+    starts = np.arange(0, values.shape[axis], factor)
+    if pooling == 'max':
+        return np.maximum.reduceat(values, starts, axis=axis)
+    counts = np.diff(np.append(starts, values.shape[axis]))
+    shape = [1] * values.ndim
+    shape[axis] = len(counts)
+    return np.add.reduceat(values, starts, axis=axis) / counts.reshape(shape).astype(values.dtype)
+
+def _mapped_npy_path(array):
+    """
+    Return the path of the float32 .npy file that `array` memory-maps in
+    full, or None if it is not such a memmap.
+    """
+    path = getattr(array, 'filename', None)
+    if not isinstance(array, np.memmap) or path is None or not path.endswith('.npy'):
+        return None
+    if array.dtype != np.float32 or not array.flags.c_contiguous:
+        return None
+    mapped = np.load(path, mmap_mode='r')
+    if mapped.shape != array.shape or mapped.dtype != array.dtype or mapped.offset != array.offset:
+        return None
+    return os.path.abspath(path)
+
+def build_stft_pyramid(stft_power, frequencies, time_intervals, pyramid_dir, pooling='max', factor=2,
+                       scaling='power', min_frames=512, chunk_frames=8192):
+    """
+    Build an on-disk multi-resolution pyramid of a multi-channel spectrogram.
+
+    Level 0 is the full-resolution spectrogram. Every further level pools
+    `factor` frames in time, and `factor` frequency bins while more than 128
+    bins remain, until fewer than `min_frames` frames would be left. Each
+    level is written as a float32 .npy file and built in time chunks from the
+    previous level, so memory use stays bounded for memory-mapped input.
+    When stft_power is a memory-mapped float32 .npy file, e.g. the output of
+    compute_stft_power with out_path, that file is referenced as level 0
+    instead of being copied, so it must stay in place while the pyramid is
+    used.
+
+    Parameters:
+    stft_power : ndarray
+        STFT magnitude, power or dB power (channels x freqs x frames), e.g. the
+        output of compute_stft_power.
+    frequencies : ndarray
+        Frequencies corresponding to the STFT.
+    time_intervals : ndarray
+        Time intervals of the STFT.
+    pyramid_dir : str
+        Directory to store the pyramid (created if missing).
+    pooling : str, optional
+        'max' keeps short bursts visible at coarse levels, 'mean' averages them.
+    factor : int, optional
+        Pooling factor between consecutive levels.
+    scaling : str, optional
+        Scaling of stft_power ('magnitude', 'power' or 'db'), used when plotting.
+    min_frames : int, optional
+        Smallest number of frames of the coarsest level.
+    chunk_frames : int, optional
+        Number of frames read per chunk; rounded down to a multiple of factor.
+
+    Returns:
+    metadata : dict
+        Pyramid description as stored in pyramid.json.
+    """
+    if pooling not in ('max', 'mean'):
+        raise ValueError(f"Unknown pooling '{pooling}', expected 'max' or 'mean'")
+    os.makedirs(pyramid_dir, exist_ok=True)
+    chunk_frames = max(chunk_frames // factor, 1) * factor
+
+    time_step = float(time_intervals[1] - time_intervals[0]) if len(time_intervals) > 1 else 0.0
+    frequency_step = float(frequencies[1] - frequencies[0]) if len(frequencies) > 1 else 0.0
+    levels = []
+    source = stft_power
+    level = 0
+    while True:
+        pool_frequency = level > 0 and levels[-1]['shape'][1] > 128
+        num_channels, num_freqs, num_frames = source.shape
+        if level > 0:
+            num_frames = -(-num_frames // factor)
+            if pool_frequency:
+                num_freqs = -(-num_freqs // factor)
+            time_step *= factor
+            if pool_frequency:
+                frequency_step *= factor
+
+        path = _mapped_npy_path(source) if level == 0 else None
+        if path is None:
+            path = f"level_{level}.npy"
+            target = np.lib.format.open_memmap(os.path.join(pyramid_dir, path), mode='w+', dtype=np.float32, shape=(num_channels, num_freqs, num_frames))
+            step = 1 if level == 0 else factor
+            for first in range(0, source.shape[-1], chunk_frames):
+                chunk = np.asarray(source[:, :, first:first + chunk_frames], dtype=np.float32)
+                if level > 0:
+                    chunk = _pool_axis(chunk, factor, 2, pooling)
+                    if pool_frequency:
+                        chunk = _pool_axis(chunk, factor, 1, pooling)
+                target[:, :, first // step:first // step + chunk.shape[-1]] = chunk
+            target.flush()
+            source = target
+
+        levels.append({'shape': [num_channels, num_freqs, num_frames], 'time_step': time_step,
+                       'frequency_step': frequency_step, 'path': path})
+        level += 1
+        if -(-num_frames // factor) < min_frames:
+            break
+
+    metadata = {
+        'pooling': pooling,
+        'factor': factor,
+        'scaling': scaling,
+        'frequency_range': [float(frequencies[0]), float(frequencies[-1])],
+        'time_range': [float(time_intervals[0]), float(time_intervals[-1])],
+        'levels': levels,
+    }
+    with open(os.path.join(pyramid_dir, 'pyramid.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+def load_stft_pyramid_level(pyramid_dir, width_px, time_range=None):
+    """
+    Load the coarsest pyramid level that still has at least one frame per
+    output pixel over the requested time range.
+
+    Parameters:
+    pyramid_dir : str
+        Directory of a pyramid built with build_stft_pyramid.
+    width_px : int
+        Width of the output image in pixels.
+    time_range : tuple of float, optional
+        Start and end time in seconds (default: the whole recording).
+
+    Returns:
+    level_data : ndarray
+        Memory-mapped slice of the level (channels x freqs x frames) covering time_range.
+    extent : list of float
+        [t_start, t_end, f_max, f_min] for imshow, spanning the returned
+        frames (which may start before and end after time_range).
+    metadata : dict
+        Pyramid description as stored in pyramid.json.
+    """
+    with open(os.path.join(pyramid_dir, 'pyramid.json')) as f:
+        metadata = json.load(f)
+    t_first, t_last = metadata['time_range']
+    t_start, t_end = time_range if time_range is not None else (t_first, t_last)
+
+    level = 0
+    for i, level_info in enumerate(metadata['levels']):
+        if level_info['time_step'] == 0 or (t_end - t_start) / level_info['time_step'] >= width_px:
+            level = i
+
+    level_info = metadata['levels'][level]
+    level_data = np.load(os.path.join(pyramid_dir, level_info['path']), mmap_mode='r')
+    time_step = level_info['time_step']
+    if time_step > 0:
+        first = max(int((t_start - t_first) // time_step), 0)
+        last = int(np.ceil((t_end - t_first) / time_step)) + 1
+        level_data = level_data[:, :, first:last]
+        # The extent follows the frames actually returned, which start at the
+        # pooled frame containing t_start rather than at t_start itself
+        t_start = t_first + first * time_step
+        t_end = t_start + level_data.shape[-1] * time_step
+
+    f_min, f_max = metadata['frequency_range']
+    if level_info['frequency_step'] > 0:
+        # Like the time extent, span whole bins of the level, including a
+        # partial last bin when the bins did not divide by the pooling factor
+        f_max = f_min + level_info['shape'][1] * level_info['frequency_step']
+    return level_data, [t_start, t_end, f_max, f_min], metadata
+
+def plot_stft_pyramid(pyramid_dir, channel, width_px=1920, time_range=None, channel_name=None):
+    """
+    Plot a channel's spectrogram from the pyramid level matching the output width.
+
+    Parameters:
+    pyramid_dir : str
+        Directory of a pyramid built with build_stft_pyramid.
+    channel : int
+        Index of the channel to plot.
+    width_px : int, optional
+        Width of the output image in pixels.
+    time_range : tuple of float, optional
+        Start and end time in seconds (default: the whole recording).
+    channel_name : str, optional
+        Name of the channel (for title).
+    """
+    level_data, extent, metadata = load_stft_pyramid_level(pyramid_dir, width_px, time_range)
+    values = np.asarray(level_data[channel])
+    if metadata['scaling'] == 'power':
+        values = 10 * np.log10(values)
+    elif metadata['scaling'] == 'magnitude':
+        values = 20 * np.log10(values)
+
+    plt.figure(figsize=(width_px / 100, 4), dpi=100)
+    plt.imshow(values, aspect='auto', cmap='inferno', extent=extent)
     if channel_name:
         plt.title(f'STFT for Channel {channel_name}')
     plt.xlabel('Time [s]')
@@ -76,7 +408,7 @@ def plot_stft(frequencies, time_intervals, stft_data, channel_name=None):
     plt.colorbar(label='Power/Frequency [dB/Hz]')
     plt.show()
 
-def process_eeg_data(eeg_data, fs, window_size):
+def process_eeg_data(eeg_data, fs, window_size, output_dir=None, montage=False, n_jobs=None):
     """
     Process EEG data to calculate and plot STFT for each channel.
 
@@ -87,8 +419,29 @@ def process_eeg_data(eeg_data, fs, window_size):
         Sampling frequency of the EEG data.
     window_size : int
         Size of each segment for STFT in samples.
+    output_dir : str, optional
+        If given, figures are rendered headless (Agg) to this directory
+        instead of being shown.
+    montage : bool, optional
+        With output_dir, save one multi-panel montage instead of one image per channel.
+    n_jobs : int, optional
+        With output_dir, number of rendering workers (default: the package executor).
+
+    Returns:
+    frequencies : ndarray
+        Frequencies corresponding to the STFT.
+    time_intervals : ndarray
+        Time intervals of the STFT.
+    stft_data : ndarray
+        STFT of each channel (channels x frequencies x time intervals).
     """
-    for i in range(eeg_data.shape[0]):
-        channel_data = eeg_data[i, :]
-        frequencies, time_intervals, stft_data = compute_stft(channel_data, fs, window_size)
-        plot_stft(frequencies, time_intervals, stft_data, channel_name=f'Channel {i+1}')
+    frequencies, time_intervals, stft_data = compute_stft(eeg_data, fs, window_size)
+
+    if output_dir is not None:
+        panels = [(frequencies, time_intervals, stft_data[i], f'Channel {i+1}') for i in range(eeg_data.shape[0])]
+        render_panels(draw_stft, panels, output_dir, 'stft', montage=montage, n_jobs=n_jobs)
+    else:
+        for i in range(eeg_data.shape[0]):
+            plot_stft(frequencies, time_intervals, stft_data[i], channel_name=f'Channel {i+1}')
+
+    return frequencies, time_intervals, stft_data
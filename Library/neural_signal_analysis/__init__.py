@@ -1,14 +1,22 @@
+from . import band_power
+from . import batch_rendering
+from . import embedding_cache
 from . import FFT
 from . import frequency_maximum_power
 from . import higuch_fractal_dimension
 from . import MFDFA_neural
+from . import multitaperPSD
+from . import parallel
 from . import phase_space_2d
 from . import phase_space_3d
 from . import spectral_centroids
 from . import spectral_edge_density
 from . import spectral_entropy_signals
+from . import spectral_features
 from . import STFTsignal
+from . import time_delay
 from . import transfer_entropy_all_signals
 from . import transfer_entropy_hemispheric
+from . import transfer_entropy_matrix
 from . import transfer_entropy_regional
 from . import welchsPSD
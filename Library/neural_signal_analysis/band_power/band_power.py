@@ -0,0 +1,176 @@
+"""
+Band Power Analysis Module
+
+This module computes the power in named frequency bands (e.g. delta, theta, alpha, beta, gamma) for every channel and epoch of EEG data. The spectrum of the whole batch is computed in one call, band index masks are built once per frequency grid, and all band powers are obtained with a single matrix product.
+
+Functions:
+- compute_band_power(data, fs, bands, method, nperseg, relative, spectrum): Computes absolute or relative band power for all channels and epochs.
+- plot_band_power(band_power, bands, channel_names): Plots the band power of each channel as grouped bars.
+- process_eeg_data(eeg_data, fs, bands, method, nperseg, relative): Processes EEG data to calculate and plot band power for each channel.
+
+Example Usage:
+---------------
+import numpy as np
+from band_power import CANONICAL_BANDS, compute_band_power, process_eeg_data
+
+# Sample epoched EEG data (100 epochs x 8 channels x 1000 data points)
+epochs = np.random.rand(100, 8, 1000)
+fs = 250  # Sampling frequency in Hz
+
+# Absolute band power (epochs x channels x bands) from one batched Welch estimate
+band_power = compute_band_power(epochs, fs, nperseg=250)
+
+# Relative power in custom bands
+bands = {'theta': (4, 8), 'alpha': (8, 13)}
+relative_power = compute_band_power(epochs, fs, bands=bands, relative=True)
+
+# Process EEG data (3 channels x 1000 data points) and plot band power
+eeg_data = np.random.rand(3, 1000)
+process_eeg_data(eeg_data, fs)
+
+Note:
+-----
+Bands are half-open intervals [low, high) in Hz, and the band axis follows the order of the bands dictionary. Relative power is the band power divided by the total power of the whole spectrum.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from FFT.FFT import compute_fft_batch
+from welchsPSD.welchsPSD import calculate_psd
+
+CANONICAL_BANDS = {
+    'delta': (1, 4),
+    'theta': (4, 8),
+    'alpha': (8, 13),
+    'beta': (13, 30),
+    'gamma': (30, 45),
+}
+
+
+@lru_cache(maxsize=32)
+def _band_weights(num_frequencies, frequency_step, band_limits):
+    """
+    Return the (frequencies x bands) integration weights of the bands on a
+    uniform frequency grid starting at 0 Hz, cached per grid and band set.
+    """
+    frequencies = np.arange(num_frequencies) * frequency_step
+    weights = np.stack([(frequencies >= low) & (frequencies < high) for low, high in band_limits], axis=-1)
+    weights = weights * frequency_step
+    weights.setflags(write=False)
+    return weights
+
+def compute_band_power(data, fs, bands=None, method='welch', nperseg=None, relative=False, spectrum=None):
+    """
+    Compute the power in named frequency bands for all channels and epochs.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. (channels x samples)
+        or (epochs x channels x samples).
+    fs : float
+        Sampling frequency of the data.
+    bands : dict, optional
+        Mapping of band names to (low, high) limits in Hz (default: CANONICAL_BANDS).
+    method : str, optional
+        'welch' for a Welch PSD (see welchsPSD.calculate_psd) or 'fft' for a
+        single real-FFT periodogram (see FFT.compute_fft_batch), scaled to the
+        same one-sided density as Welch's method.
+    nperseg : int, optional
+        Segment length for Welch's method (default: 1024, or the signal length
+        if shorter).
+    relative : bool, optional
+        If True, return each band power divided by the total power.
+    spectrum : tuple of ndarrays, optional
+        Precomputed (frequencies, psd) on a uniform grid starting at 0 Hz. If
+        given, no spectrum is computed and data is not used.
+
+    Returns:
+    band_power : ndarray
+        Band power with the time axis replaced by a band axis, e.g.
+        (epochs x channels x bands), in the order of `bands`.
+    """
+    if bands is None:
+        bands = CANONICAL_BANDS
+
+    if spectrum is None:
+        data = np.asarray(data)
+        if method == 'welch':
+            nperseg = min(nperseg or 1024, data.shape[-1])
+            spectrum = calculate_psd(data, fs, nperseg)
+        elif method == 'fft':
+            frequencies, psd = compute_fft_batch(data, fs)
+            # One-sided power spectral density, as from Welch's method: |X|^2 / (fs * N),
+            # doubled except at DC and (for even N) the Nyquist frequency
+            num_samples = data.shape[-1]
+            psd = psd / (fs * num_samples)
+            psd[..., 1:num_samples - num_samples // 2] *= 2
+            spectrum = (frequencies, psd)
+        else:
+            raise ValueError(f"Unknown method '{method}', expected 'welch' or 'fft'")
+    frequencies, psd = spectrum
+
+    frequency_step = float(frequencies[1] - frequencies[0])
+    band_limits = tuple((float(low), float(high)) for low, high in bands.values())
+    weights = _band_weights(len(frequencies), frequency_step, band_limits)
+
+    band_power = psd @ weights
+    if relative:
+        band_power /= psd.sum(axis=-1, keepdims=True) * frequency_step
+    return band_power
+
+def plot_band_power(band_power, bands, channel_names):
+    """
+    Plot the band power of each channel as grouped bars.
+
+    Parameters:
+    band_power : ndarray
+        Band power (channels x bands).
+    bands : dict
+        Mapping of band names to (low, high) limits in Hz.
+    channel_names : list
+        List of channel names.
+    """
+    positions = np.arange(len(channel_names))
+    width = 0.8 / len(bands)
+    plt.figure(figsize=(10, 5))
+    for j, band_name in enumerate(bands):
+        plt.bar(positions + j * width, band_power[:, j], width, label=band_name)
+    plt.xticks(positions + width * (len(bands) - 1) / 2, channel_names, rotation=45, ha='right')
+    plt.xlabel('Channel')
+    plt.ylabel('Band Power')
+    plt.title('Band Power across Channels')
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+def process_eeg_data(eeg_data, fs, bands=None, method='welch', nperseg=None, relative=False):
+    """
+    Process EEG data to calculate and plot band power for each channel.
+
+    Parameters:
+    eeg_data : ndarray
+        EEG data array (channels x time series data).
+    fs : float
+        Sampling frequency of the EEG data.
+    bands : dict, optional
+        Mapping of band names to (low, high) limits in Hz (default: CANONICAL_BANDS).
+    method : str, optional
+        'welch' or 'fft' (see compute_band_power).
+    nperseg : int, optional
+        Segment length for Welch's method.
+    relative : bool, optional
+        If True, plot relative instead of absolute band power.
+
+    Returns:
+    band_power : ndarray
+        Band power of each channel (channels x bands).
+    """
+    if bands is None:
+        bands = CANONICAL_BANDS
+    band_power = compute_band_power(eeg_data, fs, bands, method, nperseg, relative)
+    channel_names = [f'Channel {i+1}' for i in range(eeg_data.shape[0])]
+    plot_band_power(band_power, bands, channel_names)
+    return band_power
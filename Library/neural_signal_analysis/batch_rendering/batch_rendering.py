@@ -0,0 +1,114 @@
+"""
+Batch Rendering Module
+
+This module renders per-channel figures without an interactive display. Figures are drawn on the non-interactive Agg canvas and saved to files, either as one image per channel (rendered in parallel by the package executor) or as one multi-panel montage per recording. It is used by the process_eeg_data helpers of the plotting modules so that large channel counts can be processed on headless render nodes.
+
+Functions:
+- render_panels(draw_func, panels, output_dir, file_prefix, montage, n_jobs, figsize, dpi, axes_per_panel): Renders one figure per panel, or a single montage, to image files.
+
+Example Usage:
+---------------
+import numpy as np
+from FFT import compute_fft_batch, draw_psd
+from batch_rendering import render_panels
+
+# Sample EEG data (64 channels x 1000 data points)
+eeg_data = np.random.rand(64, 1000)
+frequencies, psd = compute_fft_batch(eeg_data, 250)
+
+# One PNG per channel, rendered on the package executor
+panels = [(frequencies, psd[i], f'Channel {i+1}') for i in range(psd.shape[0])]
+paths = render_panels(draw_psd, panels, '/path/to/save/plots', 'fft_psd')
+
+# One montage per recording
+paths = render_panels(draw_psd, panels, '/path/to/save/plots', 'fft_psd', montage=True)
+
+Note:
+-----
+draw_func is called as draw_func(*axes, *panel) and must be a module-level function so that it can be sent to worker processes. Nothing in this module imports matplotlib.pyplot, so no GUI backend is ever started.
+"""
+
+import math
+import os
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from parallel.parallel import parallel_map
+
+
+def _render_figure(draw_func, panel, output_path, figsize, dpi, axes_per_panel):
+    """
+    Draw a single panel on its own Agg figure and save it to output_path.
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = [fig.add_subplot(1, axes_per_panel, j + 1) for j in range(axes_per_panel)]
+    draw_func(*axes, *panel)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi)
+    return output_path
+
+def _render_figure_task(task):
+    """
+    Unpack one (draw_func, panel, output_path, figsize, dpi, axes_per_panel) task for parallel_map.
+    """
+    return _render_figure(*task)
+
+def _render_montage(draw_func, panels, output_path, figsize, dpi, axes_per_panel):
+    """
+    Draw all panels on one Agg figure laid out as a grid and save it to output_path.
+    """
+    num_cols = math.ceil(math.sqrt(len(panels)))
+    num_rows = math.ceil(len(panels) / num_cols)
+    fig = Figure(figsize=(figsize[0] * num_cols, figsize[1] * num_rows))
+    FigureCanvasAgg(fig)
+    for i, panel in enumerate(panels):
+        row, col = divmod(i, num_cols)
+        axes = [fig.add_subplot(num_rows, num_cols * axes_per_panel, row * num_cols * axes_per_panel + col * axes_per_panel + j + 1)
+                for j in range(axes_per_panel)]
+        draw_func(*axes, *panel)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi)
+    return output_path
+
+def render_panels(draw_func, panels, output_dir, file_prefix, montage=False, n_jobs=None,
+                  figsize=(8, 5), dpi=100, axes_per_panel=1):
+    """
+    Render panels to image files on the non-interactive Agg backend.
+
+    Parameters:
+    draw_func : callable
+        Module-level function called as draw_func(*axes, *panel).
+    panels : list of tuples
+        Positional arguments for draw_func, one tuple per channel.
+    output_dir : str
+        Directory to save the images (created if missing).
+    file_prefix : str
+        Prefix of the saved file names.
+    montage : bool, optional
+        If True, draw all panels on a single multi-panel figure.
+    n_jobs : int, optional
+        Number of workers for per-channel figures (default: the configured
+        package executor, see parallel.parallel_backend). Use 1 to render in
+        the calling process.
+    figsize : tuple, optional
+        Size of one panel in inches.
+    dpi : int, optional
+        Resolution of the saved images.
+    axes_per_panel : int, optional
+        Number of side-by-side axes drawn for each panel.
+
+    Returns:
+    output_paths : list of str
+        Paths of the saved images.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    if montage:
+        output_path = os.path.join(output_dir, f"{file_prefix}_montage.png")
+        return [_render_montage(draw_func, panels, output_path, figsize, dpi, axes_per_panel)]
+
+    output_paths = [os.path.join(output_dir, f"{file_prefix}_channel_{i+1}.png") for i in range(len(panels))]
+    tasks = [(draw_func, panel, path, figsize, dpi, axes_per_panel) for panel, path in zip(panels, output_paths)]
+    return parallel_map(_render_figure_task, tasks, n_jobs=n_jobs)
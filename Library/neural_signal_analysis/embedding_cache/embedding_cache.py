@@ -0,0 +1,223 @@
+"""
+Embedding Cache Module
+
+This module caches embedding delays so that the phase space and transfer entropy modules can share them instead of recomputing them for the same channel, and gives those modules a common entry point for delay embeddings. Entries are keyed by a BLAKE2b hash of the data (its bytes, dtype and shape) together with the parameters, and are kept in an in-memory LRU in front of an optional on-disk store of .npy files.
+
+Functions:
+- cache_key(data, kind, **params): Computes the content hash identifying data and parameters.
+- cached_delay(data, max_delay, subsample_factor, num_bins, criterion, method): Returns the embedding delay of every channel, computed once per recording and parameter set.
+- cached_embedding(data, emb_dim, delay, copy): Returns the delay embedding of every channel as a read-only view of the data.
+- set_cache_config(cache_dir, max_bytes): Sets the on-disk store and the memory budget of the LRU.
+- clear_cache(disk): Empties the in-memory LRU and optionally the on-disk store.
+
+Example Usage:
+---------------
+import numpy as np
+from embedding_cache import cached_delay, cached_embedding, set_cache_config
+
+# Keep results across sessions in addition to memory
+set_cache_config(cache_dir='/path/to/cache')
+
+# Sample EEG channel (100000 data points)
+channel_data = np.random.rand(100000)
+
+# The first call estimates the delay; later calls with the same data and parameters
+# (from this or any other module) return the stored value
+delay = cached_delay(channel_data, max_delay=100, subsample_factor=10)
+
+# (samples - (emb_dim - 1) * delay) x emb_dim embedding, a read-only view of channel_data
+embedded_data = cached_embedding(channel_data, emb_dim=3, delay=delay)
+
+Note:
+-----
+Cached arrays and embeddings are shared between callers and are therefore read-only; copy them before modifying. Because keys are computed from the data contents, an array modified in place gets a new key rather than a stale result. Delays are cached per full parameter tuple: the phase space and transfer entropy modules share a delay only when they call with the same parameters (e.g. the same max_delay), and different parameters may give different delays. The on-disk store is never pruned automatically; use clear_cache(disk=True) to remove it.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from time_delay.time_delay import embed, estimate_delay
+
+# Default memory budget of the in-memory LRU, in bytes
+DEFAULT_MAX_BYTES = 2 ** 29
+
+_config = {'cache_dir': None, 'max_bytes': DEFAULT_MAX_BYTES}
+
+# key -> cached array, least recently used first
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+def set_cache_config(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Set the on-disk store and the memory budget of the cache.
+
+    Parameters:
+    cache_dir : str, optional
+        Directory of the on-disk store (created if needed). None keeps
+        entries in memory only.
+    max_bytes : int, optional
+        Largest total size of the arrays kept in memory; the least recently
+        used entries are dropped beyond it.
+    """
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    _config['cache_dir'] = cache_dir
+    _config['max_bytes'] = max_bytes
+    with _lock:
+        _evict()
+
+def clear_cache(disk=False):
+    """
+    Empty the in-memory cache, and with disk=True the on-disk store.
+
+    Parameters:
+    disk : bool, optional
+        Also delete the .npy files of the configured cache directory.
+    """
+    with _lock:
+        _memory.clear()
+    cache_dir = _config['cache_dir']
+    if disk and cache_dir is not None:
+        for file_name in os.listdir(cache_dir):
+            if file_name.endswith('.npy'):
+                os.remove(os.path.join(cache_dir, file_name))
+
+def cache_key(data, kind, **params):
+    """
+    Compute the content hash identifying data and parameters.
+
+    Parameters:
+    data : array_like
+        Data the cached value is computed from.
+    kind : str
+        Name of the cached quantity, e.g. 'delay'.
+    **params
+        Parameters of the computation.
+
+    Returns:
+    key : str
+        Hexadecimal BLAKE2b digest.
+    """
+    data = np.ascontiguousarray(data)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((kind, data.dtype.str, data.shape, sorted(params.items()))).encode())
+    digest.update(data.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+def _evict():
+    """
+    Drop least recently used entries until the memory budget is met.
+    """
+    total = sum(value.nbytes for value in _memory.values())
+    while _memory and total > _config['max_bytes']:
+        _, value = _memory.popitem(last=False)
+        total -= value.nbytes
+
+def _lookup(key):
+    """
+    Return the cached array for key from memory or disk, or None.
+    """
+    with _lock:
+        value = _memory.get(key)
+        if value is not None:
+            _memory.move_to_end(key)
+            return value
+
+    cache_dir = _config['cache_dir']
+    if cache_dir is None:
+        return None
+    path = os.path.join(cache_dir, f"{key}.npy")
+    if not os.path.exists(path):
+        return None
+    value = np.load(path, mmap_mode='r')
+    with _lock:
+        _memory[key] = value
+        _evict()
+    return value
+
+def _store(key, value):
+    """
+    Store a computed array in memory and, if configured, on disk.
+    """
+    value = np.array(value)
+    value.setflags(write=False)
+    with _lock:
+        _memory[key] = value
+        _evict()
+
+    cache_dir = _config['cache_dir']
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"{key}.npy")
+        # Write under a temporary name so readers never see a partial file
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            np.save(f, value)
+        os.replace(temporary_path, path)
+    return value
+
+def cached_delay(data, max_delay=100, subsample_factor=10, num_bins=16, criterion='first_minimum', method='ami'):
+    """
+    Return the embedding delay of each channel, estimated once per data and
+    parameters with time_delay.estimate_delay.
+
+    The cache key is the data together with the full parameter tuple, so
+    calls differ in any parameter, including max_delay, get separate entries.
+    They can also get different delays: estimate_delay evaluates every lag
+    on the same N - max_delay sample pairs, so the AMI curve, and with it
+    the chosen delay, depends on max_delay.
+
+    Parameters:
+    data : array_like
+        One-dimensional time series data or (channels x time series data).
+    max_delay : int, optional
+        Largest delay to consider.
+    subsample_factor : int, optional
+        Factor by which to subsample the data for efficiency.
+    num_bins : int, optional
+        Number of bins for the AMI histograms.
+    criterion : str, optional
+        'first_minimum', 'minimum' or 'autocorrelation_zero'.
+    method : str, optional
+        'ami' or 'mic'.
+
+    Returns:
+    optimal_delay : int or ndarray
+        Delay in samples of the subsampled data; an int for one-dimensional
+        input, otherwise one per channel.
+    """
+    data = np.asarray(data, dtype=float)
+    key = cache_key(data, 'delay', max_delay=max_delay, subsample_factor=subsample_factor,
+                    num_bins=num_bins, criterion=criterion, method=method)
+    delays = _lookup(key)
+    if delays is None:
+        delays = _store(key, estimate_delay(data, max_delay, subsample_factor, num_bins, criterion, method))
+    return int(delays) if delays.ndim == 0 else np.array(delays)
+
+def cached_embedding(data, emb_dim, delay, copy=False):
+    """
+    Return the delay embedding of each channel.
+
+    Row i of the embedding is (x[i], x[i + delay], ..., x[i + (emb_dim - 1) * delay]).
+    The embedding is built with time_delay.embed as a strided view of the
+    data, which is cheaper than any lookup, so it is not cached.
+
+    Parameters:
+    data : array_like
+        One-dimensional time series data or (channels x time series data).
+    emb_dim : int
+        Embedding dimension.
+    delay : int
+        Delay time steps.
+    copy : bool, optional
+        If True, return a writable, contiguous copy instead of a view.
+
+    Returns:
+    embedded_data : ndarray
+        Embedding of shape (..., samples - (emb_dim - 1) * delay, emb_dim);
+        read-only unless copy is True.
+    """
+    return embed(data, emb_dim, delay, copy=copy)
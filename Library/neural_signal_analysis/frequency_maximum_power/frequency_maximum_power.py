@@ -5,13 +5,15 @@ This module provides functions to compute and plot the peak frequency with the m
 
 Functions:
 - compute_peak_frequency(data, fs): Computes the peak frequency in the provided data.
+- compute_peak_frequency_zoom(data, fs, band, resolution, interpolate, window): Computes high-resolution peak frequencies within a band for multi-channel or epoched data using a zoom FFT.
+- draw_frequency_spectrum(ax, data, fs, channel_name): Draws the frequency spectrum with peak frequency marked on the given axes.
 - plot_frequency_spectrum(data, fs, channel_name): Plots the frequency spectrum with peak frequency marked.
-- process_eeg_data(eeg_data, fs): Processes EEG data to calculate and plot peak frequencies for each channel.
+- process_eeg_data(eeg_data, fs, output_dir, montage, n_jobs): Processes EEG data to calculate and plot peak frequencies for each channel, optionally rendering headless to files.
 
 Example Usage:
 ---------------
 import numpy as np
-from frequency_maximum_power import compute_peak_frequency, plot_frequency_spectrum, process_eeg_data
+from frequency_maximum_power import compute_peak_frequency, compute_peak_frequency_zoom, plot_frequency_spectrum, process_eeg_data
 
 # Example for single-channel data
 single_channel_data = np.random.rand(1000)  # Example data
@@ -23,15 +25,27 @@ plot_frequency_spectrum(single_channel_data, fs, channel_name='Channel 1')
 multi_channel_data = np.random.rand(5, 1000)  # 5 channels, example data
 process_eeg_data(multi_channel_data, fs)
 
+# Headless: save one image per channel and keep the peak frequencies
+peak_frequencies = process_eeg_data(multi_channel_data, fs, output_dir='/path/to/save/plots')
+
+# High-resolution peak alpha frequency for many 2 s epochs (epochs x channels x samples)
+epochs = np.random.rand(1000, 5, 500)
+peak_alpha = compute_peak_frequency_zoom(epochs, fs, band=(4, 15), resolution=0.01)
+
 Note:
 -----
 While designed for EEG data, this module can be used for analyzing peak frequencies in other types of time series data as well. Ensure the sampling frequency (fs) is set appropriately for your specific data.
 """
 
+from functools import lru_cache
+
 import numpy as np
 import scipy.fft
+import scipy.signal
 import matplotlib.pyplot as plt
 
+from batch_rendering.batch_rendering import render_panels
+
 def compute_peak_frequency(data, fs):
     """
     Compute the peak frequency of the provided time series data.
@@ -53,11 +67,82 @@ def compute_peak_frequency(data, fs):
     peak_frequency = positive_frequencies[np.argmax(np.abs(positive_fft_result))]
     return peak_frequency
 
-def plot_frequency_spectrum(data, fs, channel_name=None):
+@lru_cache(maxsize=16)
+def _zoom_fft(n, f_low, f_high, m, fs):
     """
-    Plot the frequency spectrum of the data with peak frequency marked.
+    Return a reusable ZoomFFT transform evaluating m points from f_low to f_high.
+    """
+    return scipy.signal.ZoomFFT(n, [f_low, f_high], m=m, fs=fs, endpoint=True)
+
+def compute_peak_frequency_zoom(data, fs, band=(4, 15), resolution=0.01, interpolate=True, window=None):
+    """
+    Compute the peak frequency within a band at high resolution using a zoom FFT.
+
+    Instead of zero-padding the whole signal to refine the fs/N bin spacing,
+    the spectrum is evaluated only inside the band of interest on a fine grid
+    with a chirp-z based zoom FFT. The transform is applied along the last
+    axis for all channels and epochs at once, and is reused across calls with
+    the same signal length, band and resolution.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional,
+        (channels x samples) or (epochs x channels x samples).
+    fs : float
+        Sampling frequency of the data.
+    band : tuple of float, optional
+        Lower and upper frequency of the band to search, in Hz.
+    resolution : float, optional
+        Frequency spacing of the evaluated grid, in Hz. The grid always
+        includes both band edges, so at most the band width.
+    interpolate : bool, optional
+        If True, refine the peak with parabolic interpolation of the
+        magnitude around the maximum grid point.
+    window : str, optional
+        Name of a scipy window applied before the transform (e.g. 'hann').
+        If None, no window is applied, as in compute_peak_frequency.
+
+    Returns:
+    peak_frequency : float or ndarray
+        Peak frequency with maximum power in the band, with one value per
+        channel (and epoch) for multi-dimensional input.
+    """
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    f_low, f_high = float(band[0]), float(band[1])
+    if f_high <= f_low:
+        raise ValueError(f"Invalid band {band}, the upper frequency must exceed the lower one")
+    # At least the two band edges, so that the grid has a defined step
+    m = max(2, int(round((f_high - f_low) / resolution)) + 1)
+    step = (f_high - f_low) / (m - 1)
+
+    if window is not None:
+        data = data * scipy.signal.get_window(window, n)
+
+    magnitude = np.abs(_zoom_fft(n, f_low, f_high, m, float(fs))(data, axis=-1))
+    peak_index = np.argmax(magnitude, axis=-1)
+    offset = np.zeros(peak_index.shape)
+
+    if interpolate:
+        inner = np.clip(peak_index, 1, m - 2)
+        left = np.take_along_axis(magnitude, (inner - 1)[..., None], axis=-1)[..., 0]
+        center = np.take_along_axis(magnitude, inner[..., None], axis=-1)[..., 0]
+        right = np.take_along_axis(magnitude, (inner + 1)[..., None], axis=-1)[..., 0]
+        denominator = left - 2 * center + right
+        # Only interior maxima with a proper (concave) neighbourhood are refined
+        valid = (peak_index == inner) & (denominator < 0)
+        offset = np.where(valid, 0.5 * (left - right) / np.where(valid, denominator, 1), 0)
+
+    peak_frequency = f_low + (peak_index + offset) * step
+    return peak_frequency[()]
+
+def draw_frequency_spectrum(ax, data, fs, channel_name=None):
+    """
+    Draw the frequency spectrum of the data with peak frequency marked on the given axes.
 
     Parameters:
+    ax : matplotlib.axes.Axes
+        Axes to draw on.
     data : array_like
         Time series data.
     fs : float
@@ -72,21 +157,35 @@ def plot_frequency_spectrum(data, fs, channel_name=None):
 
     peak_frequency = positive_frequencies[np.argmax(np.abs(positive_fft_result))]
 
+    ax.plot(positive_frequencies, np.abs(positive_fft_result), label='Power Spectral Density')
+    ax.axvline(peak_frequency, color='r', linestyle='--', label=f'Peak Frequency = {peak_frequency} Hz')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_title(f'Frequency Spectrum {" - " + channel_name if channel_name else ""}')
+    ax.set_xlabel('Frequency [Hz]')
+    ax.set_ylabel('Power Spectral Density')
+    ax.legend()
+    ax.grid(True)
+
+def plot_frequency_spectrum(data, fs, channel_name=None):
+    """
+    Plot the frequency spectrum of the data with peak frequency marked.
+
+    Parameters:
+    data : array_like
+        Time series data.
+    fs : float
+        Sampling frequency of the data.
+    channel_name : str, optional
+        Name of the channel (for title).
+    """
     plt.figure()
-    plt.plot(positive_frequencies, np.abs(positive_fft_result), label='Power Spectral Density')
-    plt.axvline(peak_frequency, color='r', linestyle='--', label=f'Peak Frequency = {peak_frequency} Hz')
-    plt.xscale('log')
-    plt.yscale('log')
-    plt.title(f'Frequency Spectrum {" - " + channel_name if channel_name else ""}')
-    plt.xlabel('Frequency [Hz]')
-    plt.ylabel('Power Spectral Density')
-    plt.legend()
-    plt.grid(True)
+    draw_frequency_spectrum(plt.gca(), data, fs, channel_name)
     plt.show()
 
 
 # Example usage of the library functions
-def process_eeg_data(eeg_data, fs):
+def process_eeg_data(eeg_data, fs, output_dir=None, montage=False, n_jobs=None):
     """
     Process EEG data to calculate and plot peak frequencies for each channel.
 
@@ -95,7 +194,29 @@ def process_eeg_data(eeg_data, fs):
         EEG data array (channels x time series data).
     fs : float
         Sampling frequency of the EEG data.
+    output_dir : str, optional
+        If given, figures are rendered headless (Agg) to this directory
+        instead of being shown.
+    montage : bool, optional
+        With output_dir, save one multi-panel montage instead of one image per channel.
+    n_jobs : int, optional
+        With output_dir, number of rendering workers (default: the package executor).
+
+    Returns:
+    peak_frequencies : ndarray
+        Peak frequency with maximum power for each channel.
     """
-    for i in range(eeg_data.shape[0]):
-        channel_data = eeg_data[i, :]
-        plot_frequency_spectrum(channel_data, fs, channel_name=f'Channel {i+1}')
+    fft_result = scipy.fft.fft(eeg_data, axis=-1)
+    frequencies = scipy.fft.fftfreq(eeg_data.shape[-1], 1.0/fs)
+    positive = frequencies >= 0
+    peak_frequencies = frequencies[positive][np.argmax(np.abs(fft_result[:, positive]), axis=-1)]
+
+    if output_dir is not None:
+        panels = [(eeg_data[i, :], fs, f'Channel {i+1}') for i in range(eeg_data.shape[0])]
+        render_panels(draw_frequency_spectrum, panels, output_dir, 'frequency_spectrum', montage=montage, n_jobs=n_jobs)
+    else:
+        for i in range(eeg_data.shape[0]):
+            channel_data = eeg_data[i, :]
+            plot_frequency_spectrum(channel_data, fs, channel_name=f'Channel {i+1}')
+
+    return peak_frequencies
@@ -13,7 +13,7 @@ Installation:
 Example Usage:
 --------------
 import numpy as np
-from higuchi_fractal import higuchi_fd, higuchi_fd_multichannel
+from higuchi_fractal import higuchi_fd, higuchi_fd_multichannel, higuchi_fd_batch, higuchi_fd_windowed
 
 # For single-channel data
 single_channel_data = np.random.rand(1000)
@@ -22,60 +22,153 @@ hfd_single = higuchi_fd(single_channel_data, k_max=10)
 # For multi-channel data
 multi_channel_data = np.random.rand(1000, 3)
 hfd_multi = higuchi_fd_multichannel(multi_channel_data, k_max=10)
+
+# For (channels x samples) or (epochs x channels x samples) data, all at once
+epoched_data = np.random.rand(20, 64, 1000)
+hfd_epochs = higuchi_fd_batch(epoched_data, k_max=10)  # shape (20, 64)
+
+# Rolling HFD trace: 4 s windows with a 250 ms hop at 250 Hz
+recording = np.random.rand(64, 250 * 600)
+hfd_trace = higuchi_fd_windowed(recording, k_max=10, window_size=1000, step=62)  # shape (64, windows)
 """
 
 import numpy as np
 
+def higuchi_fd_batch(data, k_max):
+    """
+    Compute Higuchi Fractal Dimension of many time series at once.
+
+    For each delay k, the k-sample differences |x[j+k] - x[j]| of all channels
+    are laid out in rows of k, so that column m holds the terms of the curve
+    length for initial point m; the curve lengths are then sums down the
+    columns. The only Python-level loop is over k. The curve lengths,
+    normalization and log-log fit are the same as in higuchi_fd.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional,
+        (channels x samples) or (epochs x channels x samples).
+    k_max : int
+        Maximum delay (time offset)
+
+    Returns:
+    hfd : ndarray
+        Higuchi Fractal Dimension of each time series, with the time axis
+        removed (e.g. channels or epochs x channels).
+    """
+    x = np.asarray(data, dtype=float)
+    N = x.shape[-1]
+    log_L = np.empty(x.shape[:-1] + (k_max - 1,))
+
+    for k in range(1, k_max):
+        m = np.arange(k)
+        # Number of terms in the curve length of each initial point m
+        num_terms = (N - m) // k - 1
+
+        rows = -(-(N - k) // k)
+        differences = np.zeros(x.shape[:-1] + (rows * k,))
+        differences[..., :N - k] = np.abs(x[..., k:] - x[..., :-k])
+        differences = differences.reshape(x.shape[:-1] + (rows, k))
+
+        mask = np.arange(rows)[:, None] < num_terms
+        Lkm = np.einsum('...im,im->...m', differences, mask)
+        Lkm = Lkm * (N - 1) / (N - m)
+        log_L[..., k - 1] = np.log(np.mean(Lkm, axis=-1))
+
+    # Least-squares slope of log L(k) against log k for every series at once
+    log_k = np.log(np.arange(1, k_max))
+    log_k = log_k - log_k.mean()
+    hfd = (log_L @ log_k) / (log_k @ log_k)
+
+    return hfd
+
+def higuchi_fd_windowed(data, k_max, window_size, step):
+    """
+    Compute a rolling Higuchi Fractal Dimension over sliding windows.
+
+    Each window is treated as a time series of its own, with the curve
+    lengths and normalization of higuchi_fd. Instead of recomputing every
+    window from scratch, the differences |x[j+k] - x[j]| are accumulated once
+    per delay k into running sums along each residue class j mod k; the curve
+    length of initial point m in a window is then the difference of two
+    running sums, so the cost per window does not depend on the window length.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional
+        or (channels x samples).
+    k_max : int
+        Maximum delay (time offset)
+    window_size : int
+        Length of each window in samples.
+    step : int
+        Number of samples between the starts of consecutive windows.
+
+    Returns:
+    hfd : ndarray
+        Higuchi Fractal Dimension of each window, with the time axis replaced
+        by a window axis (e.g. channels x windows). Window i covers samples
+        i*step to i*step + window_size.
+    """
+    x = np.asarray(data, dtype=float)
+    N = x.shape[-1]
+    starts = np.arange(0, N - window_size + 1, step)
+    log_L = np.empty(x.shape[:-1] + (starts.size, k_max - 1))
+
+    for k in range(1, k_max):
+        m = np.arange(k)
+        # Number of terms in the curve length of each initial point m of a window
+        num_terms = np.maximum((window_size - m) // k - 1, 0)
+
+        # running_sums[..., t + k] is the sum of the differences t, t - k, t - 2k, ...
+        rows = -(-(N - k) // k)
+        differences = np.zeros(x.shape[:-1] + (rows * k,))
+        differences[..., :N - k] = np.abs(x[..., k:] - x[..., :-k])
+        running_sums = np.zeros(x.shape[:-1] + ((rows + 1) * k,))
+        running_sums[..., k:] = np.cumsum(differences.reshape(x.shape[:-1] + (rows, k)), axis=-2).reshape(x.shape[:-1] + (rows * k,))
+
+        first = starts[:, None] + m
+        Lkm = running_sums[..., first + num_terms * k] - running_sums[..., first]
+        Lkm = Lkm * (window_size - 1) / (window_size - m)
+        log_L[..., k - 1] = np.log(np.mean(Lkm, axis=-1))
+
+    log_k = np.log(np.arange(1, k_max))
+    log_k = log_k - log_k.mean()
+    hfd = (log_L @ log_k) / (log_k @ log_k)
+
+    return hfd
+
 def higuchi_fd(data, k_max):
     """
     Compute Higuchi Fractal Dimension of a time series.
-    
+
     Parameters:
     data : list or np.array
         One-dimensional time series
     k_max : int
         Maximum delay (time offset)
-        
+
     Returns:
     hfd : float
         Higuchi Fractal Dimension
     """
-    N = len(data)
-    L = []
-    
-    x = np.asarray(data)
-    
-    for k in range(1, k_max):
-        Lk = []
-        
-        for m in range(0, k):
-            Lkm = 0
-            for i in range(1, int((N-m)/k)):
-                Lkm += abs(x[m+i*k] - x[m+i*k-k])
-            Lkm = Lkm*(N - 1)/(((N - m)/k)*k)
-            Lk.append(Lkm)
-            
-        L.append(np.log(np.mean(Lk)))
-    
-    hfd = np.polyfit(np.log(range(1, k_max)), L, 1)[0]
-    
-    return hfd
+    return float(higuchi_fd_batch(data, k_max))
 
 
 def higuchi_fd_multichannel(data, k_max):
     """
     Compute Higuchi Fractal Dimension of a multi-channel time series.
-    
+
     Parameters:
     data : 2D np.array
         Multi-dimensional time series where each column represents a channel
     k_max : int
         Maximum delay (time offset)
-        
+
     Returns:
     hfd_list : list
         List of Higuchi Fractal Dimensions for each channel
-    
+
     Example:
     --------
     data = np.random.rand(1000, 3)
@@ -84,27 +177,7 @@ def higuchi_fd_multichannel(data, k_max):
     if data.ndim == 1:
         data = np.expand_dims(data, axis=1)  # Convert 1D to 2D for consistency
 
-    num_channels = data.shape[1]
-    hfd_list = []
-
-    for channel in range(num_channels):
-        channel_data = data[:, channel]
-        N = len(channel_data)
-        L = []
-
-        for k in range(1, k_max):
-            Lk = []
-
-            for m in range(0, k):
-                Lkm = 0
-                for i in range(1, int((N-m)/k)):
-                    Lkm += abs(channel_data[m+i*k] - channel_data[m+i*k-k])
-                Lkm = Lkm*(N - 1)/(((N - m)/k)*k)
-                Lk.append(Lkm)
-
-            L.append(np.log(np.mean(Lk)))
-
-        hfd = np.polyfit(np.log(range(1, k_max)), L, 1)[0]
-        hfd_list.append(hfd)
+    # All channels in one batch, with time along the last axis
+    hfd_list = higuchi_fd_batch(data.T, k_max).tolist()
 
     return hfd_list
@@ -0,0 +1,155 @@
+"""
+Multitaper Power Spectral Density Analysis Module
+
+This module provides functions to compute and visualize the Power Spectral Density (PSD) of EEG data using the multitaper method with discrete prolate spheroidal sequence (DPSS) tapers. It processes (channels x samples) or (epochs x channels x samples) batches in a single transform and is suitable for short epochs, where the multitaper estimate has a lower variance than Welch's method.
+
+Functions:
+- get_dpss_tapers(n, NW, K): Returns the DPSS tapers and their concentration ratios, cached per (n, NW, K).
+- calculate_multitaper_psd(data, fs, NW, K, weighting): Calculates the multitaper Power Spectral Density of the provided data.
+- process_eeg_data(eeg_data, fs, NW, K, output_dir, montage, n_jobs): Processes EEG data to calculate and plot the multitaper PSD for each channel.
+
+Example Usage:
+---------------
+import numpy as np
+from multitaperPSD import calculate_multitaper_psd, process_eeg_data
+
+# Sample stimulation epochs (10000 epochs x 8 channels x 250 data points)
+epochs = np.random.rand(10000, 8, 250)
+fs = 1000  # Sampling frequency in Hz
+
+# Multitaper PSD of every epoch and channel; tapers are computed once and reused
+frequencies, psd = calculate_multitaper_psd(epochs, fs, NW=4)
+
+# Process EEG data (3 channels x 1000 data points) and plot the multitaper PSD
+eeg_data = np.random.rand(3, 1000)
+process_eeg_data(eeg_data, fs)
+
+Note:
+-----
+The tapers have unit energy, so the estimate is scaled as a density in V**2/Hz like the Welch estimate of the welchsPSD module. The DPSS cache is bounded; see get_dpss_tapers.cache_info() for its statistics.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import scipy.fft
+from scipy.signal import windows
+
+from batch_rendering.batch_rendering import render_panels
+from welchsPSD.welchsPSD import draw_psd, plot_psd
+
+
+@lru_cache(maxsize=32)
+def get_dpss_tapers(n, NW, K):
+    """
+    Return the DPSS tapers for a given window length, cached per (n, NW, K).
+
+    Parameters:
+    n : int
+        Length of the tapers in samples.
+    NW : float
+        Time-halfbandwidth product.
+    K : int
+        Number of tapers.
+
+    Returns:
+    tapers : ndarray
+        Unit-energy tapers (K x n), read-only.
+    ratios : ndarray
+        Spectral concentration ratio (eigenvalue) of each taper, read-only.
+    """
+    tapers, ratios = windows.dpss(n, NW, Kmax=K, return_ratios=True)
+    tapers = np.atleast_2d(tapers)
+    ratios = np.atleast_1d(ratios)
+    tapers.setflags(write=False)
+    ratios.setflags(write=False)
+    return tapers, ratios
+
+def calculate_multitaper_psd(data, fs, NW=4, K=None, weighting='unity'):
+    """
+    Calculate Power Spectral Density using the multitaper method.
+
+    All taper x channel products are transformed in a single batched real FFT.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional,
+        (channels x samples) or (epochs x channels x samples).
+    fs : float
+        Sampling frequency of the data.
+    NW : float, optional
+        Time-halfbandwidth product; the spectral smoothing is about NW * fs / n Hz.
+    K : int, optional
+        Number of tapers (default: 2 * NW - 1).
+    weighting : str, optional
+        'unity' averages the tapered spectra equally, 'eigen' weights each
+        taper by its concentration ratio.
+
+    Returns:
+    frequencies : ndarray
+        Array of sample frequencies.
+    psd : ndarray
+        Power spectral density of data, with the time axis replaced by the
+        frequency axis.
+    """
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    if K is None:
+        K = max(int(2 * NW) - 1, 1)
+    tapers, ratios = get_dpss_tapers(n, float(NW), int(K))
+
+    spectrum = scipy.fft.rfft(data[..., None, :] * tapers, axis=-1, workers=-1)
+    tapered_psd = spectrum.real ** 2 + spectrum.imag ** 2
+
+    if weighting == 'unity':
+        psd = tapered_psd.mean(axis=-2)
+    elif weighting == 'eigen':
+        psd = np.tensordot(tapered_psd, ratios / ratios.sum(), axes=([-2], [0]))
+    else:
+        raise ValueError(f"Unknown weighting '{weighting}', expected 'unity' or 'eigen'")
+
+    psd /= fs
+    if n % 2:
+        psd[..., 1:] *= 2
+    else:
+        psd[..., 1:-1] *= 2
+    frequencies = scipy.fft.rfftfreq(n, d=1/fs)
+    return frequencies, psd
+
+def process_eeg_data(eeg_data, fs, NW=4, K=None, output_dir=None, montage=False, n_jobs=None):
+    """
+    Process EEG data to calculate and plot the multitaper PSD for each channel.
+
+    Parameters:
+    eeg_data : ndarray
+        EEG data array (channels x time series data).
+    fs : float
+        Sampling frequency of the EEG data.
+    NW : float, optional
+        Time-halfbandwidth product.
+    K : int, optional
+        Number of tapers (default: 2 * NW - 1).
+    output_dir : str, optional
+        If given, figures are rendered headless (Agg) to this directory
+        instead of being shown.
+    montage : bool, optional
+        With output_dir, save one multi-panel montage instead of one image per channel.
+    n_jobs : int, optional
+        With output_dir, number of rendering workers (default: the package executor).
+
+    Returns:
+    frequencies : ndarray
+        Array of sample frequencies.
+    psd : ndarray
+        Power spectral density of each channel (channels x frequencies).
+    """
+    frequencies, psd = calculate_multitaper_psd(eeg_data, fs, NW, K)
+
+    if output_dir is not None:
+        panels = [(frequencies, psd[i], f'Channel {i+1}') for i in range(eeg_data.shape[0])]
+        render_panels(draw_psd, panels, output_dir, 'multitaper_psd', montage=montage, n_jobs=n_jobs)
+    else:
+        for i in range(eeg_data.shape[0]):
+            plot_psd(frequencies, psd[i], channel_name=f'Channel {i+1}')
+
+    return frequencies, psd
@@ -0,0 +1,305 @@
+"""
+Parallel Execution Module
+
+This module provides the executor layer shared by all parallel code in the package. Work is mapped over a serial, thread or process backend with a limit on the number of workers, and pools are kept alive and reused across calls and modules instead of being started for every call. Large arrays are handed to worker processes through shared memory, so tasks carry only a small handle and index ranges instead of pickled copies of the data.
+
+Functions:
+- parallel_backend(backend, n_jobs): Context manager selecting the backend and worker count, with one pool reused for everything run inside it.
+- set_parallel_config(backend, n_jobs): Sets the package-wide default backend and worker count.
+- parallel_map(func, items, n_jobs, backend, chunksize): Applies a function to every item on the configured backend and returns the results in order.
+- shutdown_executors(): Shuts down the persistent worker pools.
+- share_array(array, n_jobs, backend): Context manager placing an array in shared memory for the workers and returning a handle to it.
+- attach_array(handle): Returns the array behind a handle, without copying, inside a worker.
+
+Example Usage:
+---------------
+import numpy as np
+from parallel import attach_array, parallel_backend, parallel_map, set_parallel_config, share_array
+from transfer_entropy_matrix import transfer_entropy_significance
+from time_delay import estimate_delay
+
+binned_data = np.random.randint(0, 10, size=(64, 10000))
+
+# Reuse one pool of 8 processes for every parallel step of a recording
+with parallel_backend('process', n_jobs=8):
+    te, p_values, z_scores = transfer_entropy_significance(binned_data, num_surrogates=1000, seed=0)
+    delays = estimate_delay(np.random.rand(64, 10000), method='mic')
+
+# Threads only, e.g. inside a daemonic worker of another framework
+set_parallel_config('thread', n_jobs=4)
+
+# Map any module-level function
+squares = parallel_map(np.square, range(100), chunksize=10)
+
+# Send a recording once; each task carries only the handle and a channel range
+def channel_means(args):
+    handle, start, stop = args
+    return attach_array(handle)[start:stop].mean(axis=-1)
+
+recording = np.random.rand(64, 1000000)
+with share_array(recording) as handle:
+    means = parallel_map(channel_means, [(handle, i, i + 8) for i in range(0, 64, 8)])
+
+Note:
+-----
+Work runs serially by default. Parallel execution is opted into with parallel_backend or set_parallel_config, or per call by passing n_jobs greater than 1, which selects the process backend when none is configured. Functions sent to the process backend must be module-level so that they can be pickled. Inside a worker of this module, and in daemonic processes (which cannot start children), work falls back to running serially or on threads, so nested parallel calls do not crash. If a worker process dies, the map raises BrokenProcessPool and the pool is replaced on the next call. Arrays returned by attach_array are read-only and only valid inside the share_array block that created the handle.
+"""
+
+import atexit
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+BACKENDS = ('serial', 'thread', 'process')
+
+# Shared memory segments a worker keeps open, most recently used last
+MAX_ATTACHED = 8
+
+# Current configuration and the pools created under it, keyed by (backend, n_jobs);
+# backend None means not configured
+_state = {'backend': None, 'n_jobs': None, 'executors': {}}
+
+# True inside worker processes started by this module
+_in_worker = False
+
+# name -> SharedMemory attached in this process
+_attached = OrderedDict()
+
+def _mark_worker():
+    global _in_worker
+    _in_worker = True
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+def set_parallel_config(backend='process', n_jobs=None):
+    """
+    Set the default backend and worker count used by parallel_map.
+
+    Parameters:
+    backend : str, optional
+        'serial', 'thread' or 'process'.
+    n_jobs : int, optional
+        Maximum number of workers (default: all CPU cores).
+    """
+    _check_backend(backend)
+    _state['backend'] = backend
+    _state['n_jobs'] = n_jobs
+
+def _get_executor(backend, n_jobs):
+    """
+    Return the persistent pool for (backend, n_jobs), creating it on first use.
+    """
+    key = (backend, n_jobs)
+    executors = _state['executors']
+    executor = executors.get(key)
+    if executor is None:
+        if backend == 'process':
+            # Workers must share the parent's resource tracker, otherwise a
+            # tracker of their own reports attached segments as leaked
+            resource_tracker.ensure_running()
+            executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_mark_worker)
+        else:
+            executor = ThreadPoolExecutor(max_workers=n_jobs)
+        executors[key] = executor
+    return executor
+
+def _discard_executor(backend, n_jobs):
+    """
+    Drop the cached pool for (backend, n_jobs) so that the next call creates a new one.
+    """
+    executor = _state['executors'].pop((backend, n_jobs), None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+def shutdown_executors():
+    """
+    Shut down the persistent pools of the current configuration.
+    """
+    executors = _state['executors']
+    for executor in executors.values():
+        executor.shutdown()
+    executors.clear()
+
+atexit.register(shutdown_executors)
+
+@contextmanager
+def parallel_backend(backend='process', n_jobs=None):
+    """
+    Run the enclosed code with the given backend and worker count.
+
+    All parallel calls inside the block, from any module of the package,
+    share the same pool, which is shut down when the block exits. The
+    previous configuration is restored afterwards.
+
+    Parameters:
+    backend : str, optional
+        'serial', 'thread' or 'process'.
+    n_jobs : int, optional
+        Maximum number of workers (default: all CPU cores).
+    """
+    global _state
+    _check_backend(backend)
+    previous = _state
+    _state = {'backend': backend, 'n_jobs': n_jobs, 'executors': {}}
+    try:
+        yield
+    finally:
+        shutdown_executors()
+        _state = previous
+
+def _effective_backend(backend, n_jobs, num_items=None):
+    """
+    Resolve the backend a map will actually run on in the current process.
+
+    Without a configured backend, a call runs serially unless it asks for
+    more than one worker itself, in which case it runs on processes.
+    """
+    backend = _state['backend'] if backend is None else backend
+    if backend is None:
+        backend = 'process' if n_jobs is not None and n_jobs > 1 else 'serial'
+    n_jobs = _state['n_jobs'] if n_jobs is None else n_jobs
+    _check_backend(backend)
+
+    if backend == 'process' and _in_worker:
+        backend = 'serial'
+    elif backend == 'process' and multiprocessing.current_process().daemon:
+        backend = 'thread'
+
+    if n_jobs == 1 or (num_items is not None and num_items <= 1):
+        backend = 'serial'
+    return backend, n_jobs
+
+def parallel_map(func, items, n_jobs=None, backend=None, chunksize=1):
+    """
+    Apply func to every item and return the results in order.
+
+    Parameters:
+    func : callable
+        Function of one argument; module-level for the process backend.
+    items : iterable
+        Arguments for func.
+    n_jobs : int, optional
+        Maximum number of workers; overrides the configured value. 1 runs
+        serially in the calling process; more than one runs on processes
+        when no backend is configured.
+    backend : str, optional
+        'serial', 'thread' or 'process'; overrides the configured backend
+        (default: serial unless configured with parallel_backend or
+        set_parallel_config).
+    chunksize : int, optional
+        Number of items sent to a worker process at once.
+
+    Returns:
+    results : list
+        func(item) for every item.
+    """
+    items = list(items)
+    backend, n_jobs = _effective_backend(backend, n_jobs, len(items))
+
+    if backend == 'serial':
+        return [func(item) for item in items]
+
+    executor = _get_executor(backend, n_jobs)
+    try:
+        return list(executor.map(func, items, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A pool whose worker died (e.g. killed for memory) cannot be used
+        # again; drop it so that the next call starts a fresh one. The map is
+        # not retried, since its tasks may have had side effects or may kill
+        # the new pool the same way
+        _discard_executor(backend, n_jobs)
+        raise
+
+@contextmanager
+def share_array(array, n_jobs=None, backend=None):
+    """
+    Make an array available to the workers of parallel_map without pickling it.
+
+    On the process backend the array is copied once into a shared memory
+    segment, which is released when the block exits; the handle is a small
+    (name, shape, dtype) tuple that can be put into every task. On the serial
+    and thread backends the workers already share the caller's memory, and
+    the handle is the array itself.
+
+    Parameters:
+    array : array_like
+        Array to share.
+    n_jobs : int, optional
+        Worker count of the parallel_map calls that will use the handle.
+    backend : str, optional
+        Backend of the parallel_map calls that will use the handle.
+
+    Returns:
+    handle : tuple or ndarray
+        Handle to pass to attach_array in the workers.
+    """
+    array = np.asarray(array)
+    backend, n_jobs = _effective_backend(backend, n_jobs)
+    if backend != 'process':
+        yield array
+        return
+
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        yield (shm.name, array.shape, array.dtype.str)
+    finally:
+        _release(shm.name)
+        shm.close()
+        shm.unlink()
+
+def _release(name):
+    """
+    Close this process's attachment to a shared memory segment, if any.
+    """
+    shm = _attached.pop(name, None)
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            # Arrays viewing the segment are still alive; the mapping is
+            # released with the last of them
+            pass
+
+def attach_array(handle):
+    """
+    Return the array behind a handle created by share_array.
+
+    The shared memory segment is attached on first use and kept open in the
+    worker, so the tasks of one map attach it only once.
+
+    Parameters:
+    handle : tuple or ndarray
+        Handle from share_array.
+
+    Returns:
+    array : ndarray
+        Read-only view of the shared array, on every backend.
+    """
+    if isinstance(handle, np.ndarray):
+        # Same read-only behaviour as on the process backend
+        array = handle.view()
+        array.flags.writeable = False
+        return array
+
+    name, shape, dtype = handle
+    shm = _attached.get(name)
+    if shm is None:
+        shm = SharedMemory(name=name)
+        _attached[name] = shm
+        while len(_attached) > MAX_ATTACHED:
+            _release(next(iter(_attached)))
+    else:
+        _attached.move_to_end(name)
+
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    array.flags.writeable = False
+    return array
@@ -6,8 +6,8 @@ This module provides functions for performing phase space analysis on EEG data.
 Functions:
 - delay_embedding(data, emb_dim, delay): Performs delay embedding for each channel.
 - false_nearest_neighbors(data, emb_dim, delay, R): Computes False Nearest Neighbors for each channel.
-- determine_delay(data, max_delay, subsample_factor): Determines optimal delays for each channel using mutual information.
-- process_phase_space_analysis(eeg_data, emb_dim, max_delay, subsample_factor): Processes EEG data for phase space analysis, including delay determination and embedding.
+- determine_delay(data, max_delay, subsample_factor): Determines the optimal delay from the first minimum of the average mutual information.
+- process_phase_space_analysis(eeg_data, emb_dim, max_delay, subsample_factor): Processes EEG data for phase space analysis, including delay determination and embedding, shared through the embedding cache.
 - create_phase_space_plot(embedded_data_list, titles, output_dir): Creates and saves 2D phase space plots for each channel.
 
 Example Usage:
@@ -36,35 +36,32 @@ Ensure the EEG data is properly preprocessed. The embedding dimension and delay
 import numpy as np
 from sklearn.neighbors import NearestNeighbors
 import matplotlib.pyplot as plt
-from minepy import MINE
-import multiprocessing
 import os
 
+from embedding_cache.embedding_cache import cached_delay, cached_embedding
+from time_delay.time_delay import embed, estimate_delay
+
 def delay_embedding(data, emb_dim, delay):
     """
     Perform delay embedding on the provided data for each channel.
     
     Parameters:
-    data : 2D array_like
-        Multi-dimensional time series data where each row is a channel.
+    data : array_like
+        One-dimensional time series data, or multi-dimensional time series
+        data where each row is a channel.
     emb_dim : int
         Embedding dimension.
     delay : int
         Delay time steps.
         
     Returns:
-    embedded_data : list of ndarrays
-        The delay-embedded data for each channel.
+    embedded_data : ndarray or list of ndarrays
+        The delay-embedded data ((N - (emb_dim - 1) * delay) x emb_dim), or
+        one embedding per channel for multi-channel data. The embeddings are
+        read-only views of the data.
     """
-    num_channels = data.shape[0]
-    embedded_data = []
-    for ch in range(num_channels):
-        channel_data = data[ch, :]
-        N = len(channel_data)
-        embedded_channel_data = np.array([channel_data[i:i+emb_dim*delay:delay].flatten() 
-                                          for i in range(N - emb_dim * delay + 1)])
-        embedded_data.append(embedded_channel_data)
-    return embedded_data
+    embedded_data = embed(data, emb_dim, delay)
+    return embedded_data if embedded_data.ndim == 2 else list(embedded_data)
 
 def false_nearest_neighbors(data, emb_dim, delay, R=10):
     """
@@ -97,15 +94,6 @@ def false_nearest_neighbors(data, emb_dim, delay, R=10):
 
     return false_neighbors
 
-def mutual_info_worker(args):
-    """
-    Worker function for multiprocessing in mutual information calculation.
-    """
-    data1, data2 = args
-    mine = MINE()
-    mine.compute_score(data1, data2)
-    return mine.mic()
-
 def determine_delay(data, max_delay=100, subsample_factor=10):
     """
     Determine the optimal delay using mutual information with subsampling.
@@ -122,12 +110,8 @@ def determine_delay(data, max_delay=100, subsample_factor=10):
     optimal_delay : int
         The determined optimal delay.
     """
-    subsampled_data = data[::subsample_factor]
-    with multiprocessing.Pool() as pool:
-        args_list = [(subsampled_data[:-i], subsampled_data[i:]) for i in range(1, max_delay+1)]
-        mi_values = pool.map(mutual_info_worker, args_list)
-    min_index = np.argmin(mi_values)
-    return min_index + 1
+    # First minimum of the average mutual information, all lags in one pass
+    return estimate_delay(data, max_delay, subsample_factor)
     
 def process_phase_space_analysis(eeg_data, emb_dim, max_delay, subsample_factor=10):
     """
@@ -150,8 +134,9 @@ def process_phase_space_analysis(eeg_data, emb_dim, max_delay, subsample_factor=
     results = []
     for ch in range(eeg_data.shape[0]):
         channel_data = eeg_data[ch, :]
-        optimal_delay = determine_delay(channel_data, max_delay, subsample_factor)
-        embedded_data = delay_embedding(channel_data, emb_dim, optimal_delay)
+        # Delays and embeddings are shared with the transfer entropy modules
+        optimal_delay = cached_delay(channel_data, max_delay, subsample_factor)
+        embedded_data = cached_embedding(channel_data, emb_dim, optimal_delay)
         # Additional analysis can be added here
         results.append(embedded_data)
     return results
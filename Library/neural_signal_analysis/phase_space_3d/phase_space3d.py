@@ -6,7 +6,7 @@ This module provides functions for performing 3D phase space analysis on EEG dat
 Functions:
 - delay_embedding(data, emb_dim, delay): Performs delay embedding for each channel.
 - false_nearest_neighbors(data, emb_dim, delay, R): Computes False Nearest Neighbors for each channel.
-- determine_delay(data, max_delay, subsample_factor): Determines optimal delays for each channel using mutual information.
+- determine_delay(data, max_delay, subsample_factor): Determines optimal delays for all channels at once from the first minimum of the average mutual information.
 - create_3d_phase_space_plots(embedded_data_list, titles, show_plots, output_dir): Creates and optionally saves 3D phase space plots for each channel.
 
 Example Usage:
@@ -35,10 +35,10 @@ Ensure the EEG data is properly preprocessed. The embedding dimension and delay
 import numpy as np
 from sklearn.neighbors import NearestNeighbors
 import matplotlib.pyplot as plt
-from minepy import MINE
-import multiprocessing
 import os
 
+from time_delay.time_delay import embed, estimate_delay
+
 def delay_embedding(data, emb_dim, delay):
     """
     Perform delay embedding on the provided data for each channel.
@@ -53,18 +53,9 @@ def delay_embedding(data, emb_dim, delay):
         
     Returns:
     embedded_data : list of ndarrays
-        The delay-embedded data for each channel.
+        The delay-embedded data for each channel, as read-only views of the data.
     """
-    num_channels = data.shape[0]
-    embedded_data = []
-    for ch in range(num_channels):
-        channel_data = data[ch, :]
-        N = len(channel_data)
-        embedded_channel_data = np.zeros((N - (emb_dim - 1) * delay, emb_dim))
-        for i in range(N - (emb_dim - 1) * delay):
-            embedded_channel_data[i] = [channel_data[i + j * delay] for j in range(emb_dim)]
-        embedded_data.append(embedded_channel_data)
-    return embedded_data
+    return list(embed(np.atleast_2d(data), emb_dim, delay))
 
 def false_nearest_neighbors(data, emb_dim, delay, R=10):
     """
@@ -91,7 +82,7 @@ def false_nearest_neighbors(data, emb_dim, delay, R=10):
         N = len(channel_data)
         false_neighbors = np.zeros(emb_dim)
         for d in range(1, emb_dim + 1):
-            emb_data = delay_embedding(np.array([channel_data]), d, delay)[0]
+            emb_data = embed(channel_data, d, delay)
             nbrs = NearestNeighbors(n_neighbors=2).fit(emb_data[:-delay])
             distances, indices = nbrs.kneighbors(emb_data[:-delay])
             neighbor_index = indices[:, 1]
@@ -100,15 +91,6 @@ def false_nearest_neighbors(data, emb_dim, delay, R=10):
         false_neighbors_all.append(false_neighbors)
     return false_neighbors_all
 
-def mutual_info_worker(args):
-    """
-    Worker function for multiprocessing in mutual information calculation.
-    """
-    data1, data2 = args
-    mine = MINE()
-    mine.compute_score(data1, data2)
-    return mine.mic()
-
 def determine_delay(data, max_delay=100, subsample_factor=10):
     """
     Determine the optimal delay using mutual information with subsampling for each channel.
@@ -125,16 +107,8 @@ def determine_delay(data, max_delay=100, subsample_factor=10):
     optimal_delays : list of ints
         The determined optimal delays for each channel.
     """
-    num_channels = data.shape[0]
-    optimal_delays = []
-    for ch in range(num_channels):
-        channel_data = data[ch, :]
-        subsampled_data = channel_data[::subsample_factor]
-        with multiprocessing.Pool() as pool:
-            args_list = [(subsampled_data[:-i], subsampled_data[i:]) for i in range(1, max_delay+1)]
-            mi_values = pool.map(mutual_info_worker, args_list)
-        min_index = np.argmin(mi_values)
-        optimal_delays.append(min_index + 1)
+    # First minimum of the average mutual information, all channels and lags in one pass
+    optimal_delays = estimate_delay(np.atleast_2d(data), max_delay, subsample_factor).tolist()
     return optimal_delays
 
 def create_3d_phase_space_plots(embedded_data_list, titles, show_plots=True, output_dir=None):
@@ -17,9 +17,12 @@ setup(
         'numpy',
         'scipy',
         'matplotlib',
-        'minepy',
         'pyinform',
     ],
+    extras_require={
+        # time_delay.estimate_delay(method='mic')
+        'mic': ['minepy'],
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -5,13 +5,14 @@ This module provides functions to compute and plot the spectral edge density of
 
 Functions:
 - compute_spectral_edge_density(data, fs, percentage): Computes the spectral edge density of the provided data.
+- compute_spectral_edge_frequencies(data, fs, percentiles, spectrum): Computes several spectral edge frequencies (e.g. SEF50, SEF90, SEF95) for all channels and epochs from one cumulative power curve.
 - plot_spectral_edge_frequencies(edge_frequencies, channel_names): Plots the spectral edge frequencies for each channel.
 - process_eeg_data(eeg_data, fs, percentage): Processes EEG data to calculate and plot spectral edge frequencies for each channel.
 
 Example Usage:
 ---------------
 import numpy as np
-from spectral_edge_density import process_eeg_data
+from spectral_edge_density import process_eeg_data, compute_spectral_edge_frequencies
 
 # Sample EEG data (3 channels x 1000 data points)
 eeg_data = np.random.rand(3, 1000)
@@ -21,19 +22,28 @@ percentage = 90  # Percentage threshold for spectral edge
 # Process EEG data and plot spectral edge frequencies
 process_eeg_data(eeg_data, fs, percentage)
 
+# SEF50, SEF90 and SEF95 for every epoch and channel (epochs x channels x percentiles)
+epochs = np.random.rand(600, 3, 250)
+sef = compute_spectral_edge_frequencies(epochs, fs, percentiles=(50, 90, 95))
+
 Note:
 -----
 The spectral edge frequency is a measure used in EEG analysis to determine the frequency below which a certain percentage of the total power of the spectrum is contained.
 """
 
 import numpy as np
-import scipy.fft
 import matplotlib.pyplot as plt
 
+from FFT.FFT import compute_fft_batch
+
 def compute_spectral_edge_density(data, fs, percentage):
     """
     Compute the spectral edge density of the provided time series data.
 
+    The power spectrum is accumulated in frequency order by
+    compute_spectral_edge_frequencies, so the result is the frequency below
+    which the given percentage of the total power lies.
+
     Parameters:
     data : array_like
         One-dimensional time series data.
@@ -46,17 +56,61 @@ def compute_spectral_edge_density(data, fs, percentage):
     spectral_edge : float
         Spectral edge density based on the percentage of the total power.
     """
-    fft_result = scipy.fft.fft(data)
-    frequencies = scipy.fft.fftfreq(len(data), 1.0/fs)
-    positive_frequencies = frequencies[frequencies >= 0]
-    positive_fft_result = fft_result[frequencies >= 0]
-    magnitude = np.abs(positive_fft_result)
-    sorted_magnitude = np.sort(magnitude)[::-1]
-    cumulative_sum = np.cumsum(sorted_magnitude)
-    total_power = np.sum(magnitude)
-    threshold = total_power * percentage / 100
-    spectral_edge = positive_frequencies[np.argmax(cumulative_sum >= threshold)]
-    return spectral_edge
+    return float(compute_spectral_edge_frequencies(data, fs, [percentage])[0])
+
+def compute_spectral_edge_frequencies(data, fs, percentiles=(50, 90, 95), spectrum=None):
+    """
+    Compute spectral edge frequencies for several percentiles at once.
+
+    The cumulative power curve along frequency is computed once per channel
+    and every percentile is answered with a binary search (searchsorted) on
+    it, for all channels and epochs in one call.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional,
+        (channels x samples) or (epochs x channels x samples).
+    fs : float
+        Sampling frequency of the data.
+    percentiles : sequence of float, optional
+        Percentages of the total power, e.g. (50, 90, 95) for SEF50/90/95.
+    spectrum : tuple of ndarrays, optional
+        Precomputed one-sided (frequencies, psd), e.g. from
+        spectral_features.compute_power_spectrum. If given, no spectrum is
+        computed and data is not used.
+
+    Returns:
+    edge_frequencies : ndarray
+        Frequency below which each percentage of the total power lies, with
+        the time axis replaced by a percentile axis, e.g.
+        (epochs x channels x percentiles). NaN for channels with
+        zero total power.
+    """
+    if spectrum is None:
+        spectrum = compute_fft_batch(data, fs)
+    frequencies, psd = spectrum
+    psd = np.asarray(psd)
+    num_frequencies = psd.shape[-1]
+    rows = psd.reshape(-1, num_frequencies)
+
+    cumulative_power = np.cumsum(rows, axis=-1)
+    # Channels without power (flat or dead electrodes) have no edge frequency
+    # and are left out of the search, where their NaN curves would break the
+    # ordering of the neighbouring rows
+    valid = cumulative_power[:, -1] > 0
+    cumulative_power = cumulative_power[valid] / cumulative_power[valid, -1:]
+
+    # Offsetting each row by its index makes the flattened curves one sorted
+    # array, so a single searchsorted answers every row and percentile
+    row_offsets = np.arange(cumulative_power.shape[0])[:, np.newaxis]
+    thresholds = row_offsets + np.asarray(percentiles, dtype=float) / 100
+    edge_index = np.searchsorted((cumulative_power + row_offsets).ravel(), thresholds.ravel(), side='left')
+    edge_index = edge_index.reshape(thresholds.shape) - row_offsets * num_frequencies
+    edge_index = np.clip(edge_index, 0, num_frequencies - 1)
+
+    edge_frequencies = np.full((rows.shape[0], len(percentiles)), np.nan)
+    edge_frequencies[valid] = np.asarray(frequencies)[edge_index]
+    return edge_frequencies.reshape(psd.shape[:-1] + (len(percentiles),))
 
 def plot_spectral_edge_frequencies(edge_frequencies, channel_names):
     """
@@ -89,7 +143,7 @@ def process_eeg_data(eeg_data, fs, percentage):
     percentage : float
         Percentage threshold to define the spectral edge frequency.
     """
-    edge_frequencies = [compute_spectral_edge_density(channel_data, fs, percentage) for channel_data in eeg_data]
+    edge_frequencies = compute_spectral_edge_frequencies(eeg_data, fs, [percentage])[:, 0]
     channel_names = [f'Channel {i+1}' for i in range(eeg_data.shape[0])]
     plot_spectral_edge_frequencies(edge_frequencies, channel_names)
 
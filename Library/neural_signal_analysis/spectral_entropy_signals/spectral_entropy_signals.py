@@ -5,13 +5,15 @@ This module provides functions to compute and plot the spectral entropy of EEG d
 
 Functions:
 - compute_spectral_entropy(data, fs, nperseg): Computes the spectral entropy of the provided data.
+- spectral_entropy_from_psd(psd): Computes the spectral entropy of power spectra along the last axis, treating empty bins safely.
+- compute_spectral_entropy_windowed(data, fs, window_size, step, nperseg): Computes a spectral entropy time series over sliding windows for all channels.
 - plot_spectral_entropy(channels, entropy_values): Plots the spectral entropy values for each channel.
 - process_eeg_data(eeg_data, fs, nperseg): Processes EEG data to calculate and plot spectral entropy for each channel.
 
 Example Usage:
 ---------------
 import numpy as np
-from spectral_entropy_signals import process_eeg_data
+from spectral_entropy_signals import process_eeg_data, compute_spectral_entropy_windowed
 
 # Sample EEG data (3 channels x 1000 data points)
 eeg_data = np.random.rand(3, 1000)
@@ -21,6 +23,9 @@ nperseg = 128  # Segment length for Welch's method
 # Process EEG data and plot spectral entropy
 process_eeg_data(eeg_data, fs, nperseg)
 
+# Spectral entropy time series: 1 s windows every 0.5 s for each channel
+times, entropy = compute_spectral_entropy_windowed(eeg_data, fs, window_size=250, step=125, nperseg=nperseg)
+
 Note:
 -----
 Spectral entropy is a measure used in signal processing, often applied to EEG data to assess the complexity or regularity of the signal across different frequency bands.
@@ -30,6 +35,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.signal import welch
 
+from FFT.FFT import compute_fft_batch
+
 def compute_spectral_entropy(data, fs, nperseg):
     """
     Compute the spectral entropy of the provided data.
@@ -51,6 +58,69 @@ def compute_spectral_entropy(data, fs, nperseg):
     spectral_entropy = -np.sum(normalized_Pxx * np.log2(normalized_Pxx))
     return spectral_entropy
 
+def spectral_entropy_from_psd(psd):
+    """
+    Compute the spectral entropy of power spectra along the last axis.
+
+    Bins with zero power contribute nothing (0 * log2(0) = 0) instead of NaN.
+
+    Parameters:
+    psd : ndarray
+        Power spectra with frequency along the last axis.
+
+    Returns:
+    spectral_entropy : ndarray
+        Spectral entropy of each spectrum, in bits. NaN for spectra with
+        zero total power (e.g. flat windows from dropouts or clipping).
+    """
+    psd = np.asarray(psd)
+    total = np.sum(psd, axis=-1, keepdims=True)
+    # Spectra without power have no distribution; they give NaN without a
+    # divide warning, as zero-power channels do in spectral_edge_density
+    normalized_psd = np.divide(psd, total, out=np.full(psd.shape, np.nan), where=total > 0)
+    log_psd = np.log2(normalized_psd, out=np.zeros_like(normalized_psd), where=normalized_psd > 0)
+    return -np.sum(normalized_psd * log_psd, axis=-1)
+
+def compute_spectral_entropy_windowed(data, fs, window_size, step, nperseg=None):
+    """
+    Compute a spectral entropy time series over sliding windows.
+
+    The windows are taken as a strided view of the data, and the spectra of
+    all windows of all channels are computed in one batched transform.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional
+        or (channels x time series data).
+    fs : float
+        Sampling frequency of the data.
+    window_size : int
+        Length of each window in samples.
+    step : int
+        Number of samples between the starts of consecutive windows.
+    nperseg : int, optional
+        Length of each segment for Welch's method within a window, as in
+        compute_spectral_entropy. If None, a single periodogram of each window
+        is used.
+
+    Returns:
+    times : ndarray
+        Time of the centre of each window, in seconds.
+    spectral_entropy : ndarray
+        Spectral entropy of each window, with the time axis replaced by a
+        window axis (e.g. channels x windows).
+    """
+    data = np.asarray(data, dtype=float)
+    windows = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=-1)[..., ::step, :]
+
+    if nperseg is None:
+        _, psd = compute_fft_batch(windows, fs)
+    else:
+        _, psd = welch(windows, fs=fs, nperseg=min(nperseg, window_size), axis=-1)
+
+    times = (np.arange(windows.shape[-2]) * step + window_size / 2) / fs
+    return times, spectral_entropy_from_psd(psd)
+
 def plot_spectral_entropy(channels, entropy_values):
     """
     Plot the spectral entropy values for each channel.
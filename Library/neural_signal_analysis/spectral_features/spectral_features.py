@@ -0,0 +1,164 @@
+"""
+Spectral Features Module
+
+This module computes a bundle of spectral features (peak frequency, spectral centroid, spectral edge frequency and spectral entropy) from a single shared spectrum. The spectrum is computed once per recording, channel and window, and every feature is derived from it in one vectorized pass across channels, instead of recomputing an FFT or Welch estimate for each feature.
+
+Functions:
+- compute_power_spectrum(eeg_data, fs, nperseg): Computes the one-sided power spectrum of every channel (and epoch) in one batched call.
+- compute_spectral_features(eeg_data, fs, nperseg, percentage, spectrum): Derives all spectral features from one shared spectrum.
+- plot_spectral_features(features, channel_names): Plots each spectral feature across channels.
+- process_eeg_data(eeg_data, fs, nperseg, percentage): Processes EEG data to calculate and plot the spectral features for each channel.
+
+Example Usage:
+---------------
+import numpy as np
+from spectral_features import compute_power_spectrum, compute_spectral_features, process_eeg_data
+
+# Sample EEG data (3 channels x 1000 data points)
+eeg_data = np.random.rand(3, 1000)
+fs = 250  # Sampling frequency in Hz
+
+# Compute every feature from one FFT per channel
+features = compute_spectral_features(eeg_data, fs, percentage=90)
+print(features['peak_frequency'], features['spectral_entropy'])
+
+# Reuse a precomputed Welch spectrum for epoched data (epochs x channels x samples)
+epochs = np.random.rand(10, 3, 1000)
+spectrum = compute_power_spectrum(epochs, fs, nperseg=128)
+features = compute_spectral_features(epochs, fs, spectrum=spectrum)
+
+# Process EEG data and plot the spectral features
+process_eeg_data(eeg_data, fs)
+
+Note:
+-----
+All features are computed on the non-negative frequencies of the spectrum. The spectral centroid is weighted by spectral magnitude, as in the spectral_centroids module, while the spectral edge frequency is the frequency below which the given percentage of the total power lies.
+
+The estimate behind the features depends on nperseg. With the default nperseg=None the shared spectrum is the periodogram of the whole window, the estimate used by the frequency_maximum_power and spectral_edge_density modules, so the peak frequency and spectral edge frequency equal theirs. spectral_entropy_signals.compute_spectral_entropy uses Welch's method instead, and the entropy of the periodogram differs from that of the Welch estimate, which has fewer and smoother frequency bins; pass the same nperseg to get the same spectral entropy as that module.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.signal import welch
+
+from FFT.FFT import compute_fft_batch
+from spectral_edge_density.spectral_edge_density import compute_spectral_edge_frequencies
+from spectral_entropy_signals.spectral_entropy_signals import spectral_entropy_from_psd
+
+
+def compute_power_spectrum(eeg_data, fs, nperseg=None):
+    """
+    Compute the one-sided power spectrum of every channel in one batched call.
+
+    Parameters:
+    eeg_data : ndarray
+        EEG data with time along the last axis, e.g. (channels x time series data)
+        or (epochs x channels x time series data).
+    fs : float
+        Sampling frequency of the EEG data.
+    nperseg : int, optional
+        Segment length for Welch's method. If None, a single periodogram of
+        the whole window is computed with a real FFT, as in the
+        frequency_maximum_power and spectral_edge_density modules.
+
+    Returns:
+    frequencies : ndarray
+        Non-negative frequencies of the spectrum.
+    psd : ndarray
+        Power spectrum with the time axis replaced by the frequency axis.
+    """
+    eeg_data = np.asarray(eeg_data)
+    if nperseg is None:
+        return compute_fft_batch(eeg_data, fs)
+    return welch(eeg_data, fs=fs, nperseg=nperseg, axis=-1)
+
+def compute_spectral_features(eeg_data, fs, nperseg=None, percentage=90, spectrum=None):
+    """
+    Compute peak frequency, spectral centroid, spectral edge frequency and
+    spectral entropy from one shared spectrum.
+
+    Parameters:
+    eeg_data : ndarray
+        EEG data with time along the last axis, e.g. (channels x time series data)
+        or (epochs x channels x time series data).
+    fs : float
+        Sampling frequency of the EEG data.
+    nperseg : int, optional
+        Segment length for Welch's method (see compute_power_spectrum). The
+        default periodogram gives the peak frequency and spectral edge of the
+        per-feature modules; the spectral entropy equals
+        spectral_entropy_signals.compute_spectral_entropy only when the same
+        nperseg is passed.
+    percentage : float, optional
+        Percentage of the total power defining the spectral edge frequency.
+    spectrum : tuple of ndarrays, optional
+        Precomputed (frequencies, psd) from compute_power_spectrum. If given,
+        no spectrum is computed and eeg_data is not used.
+
+    Returns:
+    features : dict
+        Dictionary with 'peak_frequency', 'spectral_centroid', 'spectral_edge'
+        and 'spectral_entropy', each an array with one value per channel (and epoch).
+    """
+    if spectrum is None:
+        spectrum = compute_power_spectrum(eeg_data, fs, nperseg)
+    frequencies, psd = spectrum
+    psd = np.asarray(psd)
+
+    magnitude = np.sqrt(psd)
+    peak_frequency = frequencies[np.argmax(psd, axis=-1)]
+    spectral_centroid = np.sum(frequencies * magnitude, axis=-1) / np.sum(magnitude, axis=-1)
+
+    spectral_edge = compute_spectral_edge_frequencies(None, fs, [percentage], spectrum=(frequencies, psd))[..., 0]
+
+    spectral_entropy = spectral_entropy_from_psd(psd)
+
+    return {
+        'peak_frequency': peak_frequency,
+        'spectral_centroid': spectral_centroid,
+        'spectral_edge': spectral_edge,
+        'spectral_entropy': spectral_entropy,
+    }
+
+def plot_spectral_features(features, channel_names):
+    """
+    Plot each spectral feature across channels.
+
+    Parameters:
+    features : dict
+        Dictionary of per-channel feature arrays from compute_spectral_features.
+    channel_names : list
+        List of channel names.
+    """
+    fig, axes = plt.subplots(len(features), 1, figsize=(10, 3 * len(features)), sharex=True)
+    for ax, (name, values) in zip(np.atleast_1d(axes), features.items()):
+        ax.bar(channel_names, values)
+        ax.set_ylabel(name.replace('_', ' ').title())
+        ax.grid(True)
+    plt.xticks(rotation=45, ha='right')
+    plt.xlabel('Channel')
+    plt.tight_layout()
+    plt.show()
+
+def process_eeg_data(eeg_data, fs, nperseg=None, percentage=90):
+    """
+    Process EEG data to calculate and plot the spectral features for each channel.
+
+    Parameters:
+    eeg_data : ndarray
+        EEG data array (channels x time series data).
+    fs : float
+        Sampling frequency of the EEG data.
+    nperseg : int, optional
+        Segment length for Welch's method (see compute_power_spectrum).
+    percentage : float, optional
+        Percentage of the total power defining the spectral edge frequency.
+
+    Returns:
+    features : dict
+        Dictionary of per-channel feature arrays.
+    """
+    features = compute_spectral_features(eeg_data, fs, nperseg, percentage)
+    channel_names = [f'Channel {i+1}' for i in range(eeg_data.shape[0])]
+    plot_spectral_features(features, channel_names)
+    return features
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import the modules as top-level packages from the source tree, as installed by setup.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
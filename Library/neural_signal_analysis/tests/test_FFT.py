@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from FFT.FFT import compute_fft_batch, stream_sliding_dft
+
+
+def _stream(data, block_sizes):
+    bounds = np.cumsum(np.resize(block_sizes, data.shape[-1]))
+    return np.split(data, bounds[bounds < data.shape[-1]], axis=-1)
+
+
+@pytest.mark.parametrize('block_sizes', [[50], [1], [37], [37, 500, 3], [1200]])
+@pytest.mark.parametrize('resync_every', [None, 7, 1000])
+def test_sliding_dft_matches_fft(block_sizes, resync_every):
+    fs = 1000
+    window_size = 1000
+    data = np.random.default_rng(0).standard_normal((4, 6011))
+    blocks = _stream(data, block_sizes)
+    tracked = [8, 9.6, 10, 11, 12, 250]
+
+    received = 0
+    for block, (tracked_frequencies, psd) in zip(blocks, stream_sliding_dft(blocks, fs, window_size, tracked, resync_every)):
+        received += block.shape[-1]
+        # Missing samples count as zeros until a full window has been received
+        window = np.zeros((data.shape[0], window_size))
+        recent = data[:, max(received - window_size, 0):received]
+        window[:, window_size - recent.shape[-1]:] = recent
+        frequencies, expected_psd = compute_fft_batch(window, fs)
+        bins = np.searchsorted(frequencies, tracked_frequencies)
+
+        np.testing.assert_allclose(tracked_frequencies, [8, 10, 10, 11, 12, 250])
+        np.testing.assert_allclose(psd, expected_psd[:, bins], rtol=1e-8, atol=1e-8)
+
+
+def test_sliding_dft_error_stays_bounded_with_default_resync():
+    fs = 250
+    window_size = 250
+    rng = np.random.default_rng(1)
+    blocks = [rng.standard_normal((2, 5)) * 1e3 for _ in range(20000)]
+
+    for _, psd in stream_sliding_dft(blocks, fs, window_size, [10, 20]):
+        pass
+    _, expected_psd = compute_fft_batch(np.concatenate(blocks[-window_size // 5:], axis=-1), fs)
+    np.testing.assert_allclose(psd, expected_psd[:, [10, 20]], rtol=1e-13)
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from STFTsignal.STFTsignal import build_stft_pyramid, compute_stft_power, load_stft_pyramid_level
+
+
+def test_pyramid_references_memory_mapped_spectrogram(tmp_path):
+    fs = 250
+    data = np.random.default_rng(0).standard_normal((2, fs * 200))
+    spectrogram_path = str(tmp_path / 'spectrogram.npy')
+    frequencies, time_intervals, power = compute_stft_power(data, fs, 128, out_path=spectrogram_path)
+
+    metadata = build_stft_pyramid(power, frequencies, time_intervals, str(tmp_path / 'pyramid'), min_frames=50)
+
+    assert not os.path.exists(tmp_path / 'pyramid' / 'level_0.npy')
+    assert metadata['levels'][0]['path'] == os.path.abspath(spectrogram_path)
+    level_data, _, _ = load_stft_pyramid_level(str(tmp_path / 'pyramid'), width_px=10 ** 6)
+    np.testing.assert_array_equal(level_data, power)
+
+    # In-memory input has no file to reference and is written as level 0
+    build_stft_pyramid(np.asarray(power), frequencies, time_intervals, str(tmp_path / 'copy'), min_frames=50)
+    np.testing.assert_array_equal(np.load(tmp_path / 'copy' / 'level_0.npy'), power)
+
+
+def test_pyramid_frequency_extent_includes_partial_bin(tmp_path):
+    fs = 1000
+    t = np.arange(fs * 60) / fs
+    data = np.sin(2 * np.pi * 450 * t)[np.newaxis, :]
+    # 512-sample windows give 257 bins, which pool into 128 full bins and one partial bin
+    frequencies, time_intervals, power = compute_stft_power(data, fs, 512)
+
+    build_stft_pyramid(power, frequencies, time_intervals, str(tmp_path), min_frames=50)
+    level_data, extent, _ = load_stft_pyramid_level(str(tmp_path), width_px=100)
+    assert level_data.shape[1] == 129
+
+    f_max, f_min = extent[2], extent[3]
+    row = np.argmax(level_data[0].mean(axis=-1))
+    row_height = (f_max - f_min) / level_data.shape[1]
+    assert f_min + row * row_height <= 450 < f_min + (row + 1) * row_height
@@ -0,0 +1,24 @@
+import numpy as np
+
+from band_power.band_power import compute_band_power
+
+
+def test_fft_and_welch_absolute_band_power_agree():
+    fs = 250
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((4, 60 * fs))
+
+    welch_power = compute_band_power(data, fs, method='welch', nperseg=512)
+    fft_power = compute_band_power(data, fs, method='fft')
+
+    np.testing.assert_allclose(fft_power, welch_power, rtol=0.1)
+
+
+def test_fft_band_power_sums_to_signal_variance():
+    fs = 250
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal(10 * fs)
+
+    total = compute_band_power(data, fs, bands={'all': (0, fs / 2)}, method='fft')
+
+    np.testing.assert_allclose(total, np.mean(data ** 2), rtol=0.01)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from higuch_fractal_dimension.higuchi_fractal import higuchi_fd, higuchi_fd_batch, higuchi_fd_multichannel, higuchi_fd_windowed
+
+
+def reference_higuchi_fd(x, k_max):
+    # The original loop implementation of higuchi_fd
+    N = len(x)
+    L = []
+    for k in range(1, k_max):
+        Lk = []
+        for m in range(0, k):
+            Lkm = 0
+            for i in range(1, int((N - m) / k)):
+                Lkm += abs(x[m + i * k] - x[m + i * k - k])
+            Lkm = Lkm * (N - 1) / (((N - m) / k) * k)
+            Lk.append(Lkm)
+        L.append(np.log(np.mean(Lk)))
+    return np.polyfit(np.log(range(1, k_max)), L, 1)[0]
+
+
+@pytest.mark.parametrize('num_samples', [200, 257])
+@pytest.mark.parametrize('k_max', [3, 10, 17])
+def test_batch_matches_reference(num_samples, k_max):
+    data = np.random.default_rng(0).standard_normal((2, 3, num_samples)).cumsum(axis=-1)
+    expected = np.array([[reference_higuchi_fd(series, k_max) for series in epoch] for epoch in data])
+
+    np.testing.assert_allclose(higuchi_fd_batch(data, k_max), expected, rtol=1e-10)
+    np.testing.assert_allclose(higuchi_fd(data[0, 0], k_max), expected[0, 0], rtol=1e-10)
+    np.testing.assert_allclose(higuchi_fd_multichannel(data[0].T, k_max), expected[0], rtol=1e-10)
+
+
+@pytest.mark.parametrize('window_size, step', [(200, 50), (257, 62), (300, 1)])
+@pytest.mark.parametrize('k_max', [3, 10])
+def test_windowed_matches_reference(window_size, step, k_max):
+    data = np.random.default_rng(1).standard_normal((2, 1003)).cumsum(axis=-1)
+    starts = range(0, data.shape[-1] - window_size + 1, step)
+    expected = np.array([[reference_higuchi_fd(channel_data[start:start + window_size], k_max) for start in starts]
+                         for channel_data in data])
+
+    np.testing.assert_allclose(higuchi_fd_windowed(data, k_max, window_size, step), expected, rtol=1e-9)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from MFDFA_neural.mfdfa_neural import calculate_mfdfa_batch, compute_segment_variances, fluctuation_from_variances
+
+
+def reference_mfdfa(x, lags, q, order):
+    # Segment-by-segment MFDFA, as computed by the MFDFA package the module used before
+    N = len(x)
+    profile = np.cumsum(x - np.mean(x))
+    fluct = np.empty((len(lags), len(q)))
+    for i, scale in enumerate(lags):
+        num_segments = N // scale
+        segments = [profile[j * scale:(j + 1) * scale] for j in range(num_segments)]
+        segments += [profile[N - (j + 1) * scale:N - j * scale] for j in range(num_segments)]
+        t = np.arange(1, scale + 1)
+        variances = np.array([np.var(segment - np.polyval(np.polyfit(t, segment, order), t)) for segment in segments])
+        for k, q_value in enumerate(q):
+            if q_value == 0:
+                fluct[i, k] = np.exp(0.5 * np.mean(np.log(variances)))
+            else:
+                fluct[i, k] = np.mean(variances ** (q_value / 2)) ** (1 / q_value)
+    return fluct
+
+
+@pytest.mark.parametrize('order', [1, 2])
+@pytest.mark.parametrize('num_samples', [1000, 1013])
+def test_batch_matches_reference(order, num_samples):
+    data = np.random.default_rng(0).standard_normal((3, num_samples))
+    lags = np.array([5, 8, 13, 21, 34, 55, 89, 144, 233])
+    q = np.array([-5, -2, -0.5, 0, 0.5, 2, 5])
+
+    scales, fluct = calculate_mfdfa_batch(data, lags, q, order=order)
+
+    np.testing.assert_array_equal(scales, lags)
+    expected = np.array([reference_mfdfa(channel_data, lags, q, order) for channel_data in data])
+    np.testing.assert_allclose(fluct, expected, rtol=1e-8)
+
+
+def test_large_q_does_not_overflow():
+    data = np.random.default_rng(1).standard_normal((2, 2000)) * 1e3
+    scales, variances, offsets = compute_segment_variances(data, [10, 50, 200])
+    q = np.array([-60, 60])
+
+    fluct = fluctuation_from_variances(variances, offsets, q)
+
+    counts = np.diff(np.append(offsets, variances.shape[-1]))
+    for j, (start, count) in enumerate(zip(offsets, counts)):
+        segment_fluct = np.sqrt(variances[:, start:start + count])
+        # Power means scaled by the largest (q > 0) or smallest (q < 0) segment fluctuation
+        for i, extreme in enumerate((segment_fluct.min(axis=-1), segment_fluct.max(axis=-1))):
+            ratio = segment_fluct / extreme[:, None]
+            expected = extreme * np.mean(ratio ** q[i], axis=-1) ** (1 / q[i])
+            np.testing.assert_allclose(fluct[:, j, i], expected, rtol=1e-10)
+
+
+def test_matches_mfdfa_package():
+    MFDFA = pytest.importorskip('MFDFA').MFDFA
+    data = np.random.default_rng(2).standard_normal((2, 1000))
+    lags = np.array([5, 8, 13, 21, 34, 55, 89])
+    q = np.array([-3, -1, 1, 2, 3])
+
+    _, fluct = calculate_mfdfa_batch(data, lags, q)
+    for channel_data, channel_fluct in zip(data, fluct):
+        _, expected = MFDFA(channel_data, lag=lags, q=q)
+        np.testing.assert_allclose(channel_fluct, expected, rtol=1e-8)
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from parallel import parallel as parallel_module
+from parallel.parallel import (_effective_backend, parallel_backend, parallel_map,
+                               set_parallel_config, share_array)
+
+def _pid(_):
+    return os.getpid()
+
+def _exit_once(args):
+    # Kills its worker the first time it sees item 0, so a retried map would succeed
+    marker, item = args
+    if item == 0 and not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return item
+
+@pytest.fixture(autouse=True)
+def default_config():
+    state = parallel_module._state
+    parallel_module._state = {'backend': None, 'n_jobs': None, 'executors': {}}
+    yield
+    parallel_module.shutdown_executors()
+    parallel_module._state = state
+
+def test_default_runs_serially():
+    assert _effective_backend(None, None, 10) == ('serial', None)
+    assert set(parallel_map(_pid, range(4))) == {os.getpid()}
+    with share_array(np.arange(5)) as handle:
+        assert isinstance(handle, np.ndarray)
+    assert not parallel_module._state['executors']
+
+def test_explicit_n_jobs_opts_into_processes():
+    assert _effective_backend(None, 2, 10) == ('process', 2)
+    assert _effective_backend(None, 1, 10) == ('serial', 1)
+    pids = parallel_map(_pid, range(4), n_jobs=2)
+    assert os.getpid() not in pids
+
+def test_configured_backend_is_used():
+    set_parallel_config('thread', n_jobs=2)
+    assert _effective_backend(None, None, 10) == ('thread', 2)
+    with parallel_backend('process', n_jobs=2):
+        assert _effective_backend(None, None, 10) == ('process', 2)
+    assert _effective_backend(None, None, 10) == ('thread', 2)
+
+def test_broken_pool_raises_and_is_replaced(tmp_path):
+    tasks = [(str(tmp_path / 'died'), i) for i in range(4)]
+    with parallel_backend('process', n_jobs=2):
+        with pytest.raises(BrokenProcessPool):
+            parallel_map(_exit_once, tasks)
+        assert not parallel_module._state['executors']
+        assert parallel_map(_exit_once, tasks) == [0, 1, 2, 3]
@@ -0,0 +1,32 @@
+import numpy as np
+
+from spectral_edge_density.spectral_edge_density import compute_spectral_edge_density, compute_spectral_edge_frequencies
+
+
+def test_zero_power_channel_between_normal_channels():
+    fs = 250
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((3, 1000))
+    data[1] = 0
+
+    edges = compute_spectral_edge_frequencies(data, fs)
+    expected = np.concatenate([compute_spectral_edge_frequencies(data[[0]], fs),
+                               compute_spectral_edge_frequencies(data[[2]], fs)])
+
+    assert np.all(np.isnan(edges[1]))
+    np.testing.assert_array_equal(edges[[0, 2]], expected)
+
+
+def test_edge_density_follows_frequency_order():
+    fs = 250
+    rng = np.random.default_rng(1)
+    t = np.arange(1000) / fs
+    data = np.sin(2 * np.pi * 40 * t) + 0.1 * rng.standard_normal(1000)
+
+    # Brute-force reference: first frequency whose cumulative power reaches the threshold
+    power = np.abs(np.fft.rfft(data)) ** 2
+    frequencies = np.fft.rfftfreq(len(data), 1 / fs)
+    cumulative_power = np.cumsum(power) / np.sum(power)
+    for percentage in (50, 90, 95):
+        expected = frequencies[np.nonzero(cumulative_power >= percentage / 100)[0][0]]
+        assert compute_spectral_edge_density(data, fs, percentage) == expected
@@ -0,0 +1,25 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from spectral_entropy_signals.spectral_entropy_signals import compute_spectral_entropy, compute_spectral_entropy_windowed
+
+
+@pytest.mark.parametrize('nperseg', [None, 128])
+def test_flat_windows_give_nan_without_warning(nperseg):
+    fs = 250
+    data = np.random.default_rng(0).standard_normal((2, 2500))
+    # Dropout: the first channel is flat over the middle windows
+    data[0, 1000:1500] = 0
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        times, entropy = compute_spectral_entropy_windowed(data, fs, window_size=250, step=250, nperseg=nperseg)
+
+    assert np.all(np.isnan(entropy[0, 4:6]))
+    assert not np.any(np.isnan(np.delete(entropy[0], [4, 5])))
+    assert not np.any(np.isnan(entropy[1]))
+    if nperseg is not None:
+        np.testing.assert_allclose(entropy[1], [compute_spectral_entropy(data[1, i * 250:(i + 1) * 250], fs, nperseg)
+                                                for i in range(len(times))])
@@ -0,0 +1,36 @@
+import numpy as np
+
+from frequency_maximum_power.frequency_maximum_power import compute_peak_frequency
+from spectral_edge_density.spectral_edge_density import compute_spectral_edge_density
+from spectral_entropy_signals.spectral_entropy_signals import compute_spectral_entropy
+from spectral_features.spectral_features import compute_spectral_features
+
+
+def _test_data(fs):
+    rng = np.random.default_rng(0)
+    t = np.arange(1000) / fs
+    return np.array([np.sin(2 * np.pi * f * t) for f in (6, 11, 23)]) + 0.5 * rng.standard_normal((3, 1000))
+
+
+def test_default_periodogram_matches_per_feature_modules():
+    fs = 250
+    data = _test_data(fs)
+    features = compute_spectral_features(data, fs, percentage=90)
+
+    expected_peak = [compute_peak_frequency(channel_data, fs) for channel_data in data]
+    expected_edge = [compute_spectral_edge_density(channel_data, fs, 90) for channel_data in data]
+    np.testing.assert_allclose(features['peak_frequency'], expected_peak)
+    np.testing.assert_allclose(features['spectral_edge'], expected_edge)
+
+    # The periodogram entropy is not the Welch entropy of spectral_entropy_signals
+    welch_entropy = [compute_spectral_entropy(channel_data, fs, 128) for channel_data in data]
+    assert not np.allclose(features['spectral_entropy'], welch_entropy, rtol=1e-3)
+
+
+def test_welch_spectrum_matches_spectral_entropy_module():
+    fs = 250
+    data = _test_data(fs)
+    features = compute_spectral_features(data, fs, nperseg=128)
+
+    expected_entropy = [compute_spectral_entropy(channel_data, fs, 128) for channel_data in data]
+    np.testing.assert_allclose(features['spectral_entropy'], expected_entropy)
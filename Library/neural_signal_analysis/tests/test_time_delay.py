@@ -0,0 +1,84 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from time_delay.time_delay import average_mutual_information, estimate_delay
+from transfer_entropy_all_signals.transfer_entropy_regional import determine_delay as all_signals_delay
+from transfer_entropy_hemispheric.transfer_entropy_hemispheric import determine_delay as hemispheric_delay
+from transfer_entropy_regional.transfer_entropy_regional import determine_delay as regional_delay
+
+
+def reference_ami(x, max_delay, num_bins):
+    # Plug-in mutual information of (x[t], x[t + lag]) over the same N - max_delay times for every lag
+    states = np.minimum(((x - x.min()) / (x.max() - x.min()) * num_bins).astype(int), num_bins - 1)
+    n = len(states) - max_delay
+    ami = []
+    for lag in range(1, max_delay + 1):
+        pairs = Counter(zip(states[:n], states[lag:lag + n]))
+        current = Counter(states[:n])
+        lagged = Counter(states[lag:lag + n])
+        ami.append(sum(count / n * np.log2(count * n / (current[a] * lagged[b])) for (a, b), count in pairs.items()))
+    return np.array(ami)
+
+
+def sine_data(num_samples=20000, period=400, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_samples)
+    return np.stack([np.sin(2 * np.pi * t / period + phase) for phase in (0, 1, 2)]) + 0.05 * rng.standard_normal((3, num_samples))
+
+
+def test_ami_matches_reference():
+    data = sine_data()
+    subsampled = data[:, ::10]
+
+    ami = average_mutual_information(data, max_delay=60, subsample_factor=10, num_bins=16)
+
+    np.testing.assert_allclose(ami, [reference_ami(channel_data, 60, 16) for channel_data in subsampled], rtol=1e-10)
+    np.testing.assert_allclose(average_mutual_information(data[0], 60, 10), ami[0])
+
+
+def test_default_delay_is_first_ami_minimum():
+    data = sine_data()
+    curves = [reference_ami(channel_data, 60, 16) for channel_data in data[:, ::10]]
+
+    delays = estimate_delay(data, max_delay=60, subsample_factor=10)
+
+    # First lag after which the AMI rises, in samples of the subsampled data
+    expected = [np.argmax(np.diff(curve) > 0) + 1 for curve in curves]
+    np.testing.assert_array_equal(delays, expected)
+    np.testing.assert_array_equal(estimate_delay(data, 60, 10, criterion='minimum'), [np.argmin(curve) + 1 for curve in curves])
+    # The period is 40 subsampled samples: the first minimum lies within the
+    # first quarter period, while the global minimum the former MIC argmin
+    # looked for can be a later trough
+    assert np.all((delays > 40 / 8) & (delays <= 40 / 4))
+    assert np.all(estimate_delay(data, 60, 10, criterion='minimum') > 40 / 2)
+    assert np.all(np.abs(estimate_delay(data, 60, 10, criterion='autocorrelation_zero') - 40 / 4) <= 1)
+
+
+def test_modules_delegate_to_estimate_delay():
+    data = sine_data(num_samples=5000)
+    expected = estimate_delay(data[0], max_delay=30, subsample_factor=5)
+
+    for determine_delay in (regional_delay, all_signals_delay, hemispheric_delay):
+        assert determine_delay(data[0], 30, 5) == expected
+
+
+def test_mic_minimum_matches_former_determine_delay():
+    MINE = pytest.importorskip('minepy').MINE
+    data = sine_data(num_samples=4000)[0]
+    subsampled = data[::10]
+
+    # The former determine_delay: global minimum of the MIC between the signal and its lagged copy
+    mic = []
+    for lag in range(1, 31):
+        mine = MINE()
+        mine.compute_score(subsampled[:-lag], subsampled[lag:])
+        mic.append(mine.mic())
+
+    assert estimate_delay(data, 30, 10, criterion='minimum', method='mic') == np.argmin(mic) + 1
+
+
+def test_rejects_data_too_short_for_max_delay():
+    with pytest.raises(ValueError, match="max_delay"):
+        estimate_delay(np.random.rand(500), max_delay=50, subsample_factor=10)
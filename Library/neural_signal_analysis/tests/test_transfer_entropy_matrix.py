@@ -0,0 +1,186 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from parallel.parallel import parallel_backend
+from transfer_entropy_matrix import transfer_entropy_matrix as te_module
+from transfer_entropy_matrix.transfer_entropy_matrix import (surrogate_indices, transfer_entropy, transfer_entropy_matrix,
+                                                             transfer_entropy_significance, transfer_entropy_windowed)
+
+
+def reference_te(source, target, k, l, source_times=None):
+    # Plug-in TE from explicit (future, target history, source history) tuples;
+    # source_times[i] is the time of the source history paired with the i-th target time
+    start = max(k, l)
+    times = range(start, len(target))
+    source_times = times if source_times is None else source_times
+    samples = [(target[t], tuple(target[t - k:t]), tuple(source[u - l:u])) for t, u in zip(times, source_times)]
+    n = len(samples)
+    joint = Counter(samples)
+    history_source = Counter((history, source_history) for _, history, source_history in samples)
+    future_history = Counter((future, history) for future, history, _ in samples)
+    history = Counter(history for _, history, _ in samples)
+    return sum(count / n * np.log2(count * history[h] / (history_source[h, s] * future_history[y, h]))
+               for (y, h, s), count in joint.items())
+
+
+def coupled_data(num_channels, num_samples, num_bins, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, num_bins, size=(num_channels, num_samples))
+    # Channel 1 follows channel 0 with a one-sample delay half of the time
+    follow = rng.random(num_samples - 1) < 0.5
+    data[1, 1:][follow] = data[0, :-1][follow]
+    return data
+
+
+@pytest.mark.parametrize('k, l', [(1, 1), (2, 1), (1, 3), (3, 2)])
+def test_matrix_matches_plug_in_reference(k, l):
+    data = coupled_data(4, 600, 3)
+
+    te = transfer_entropy_matrix(data, k, l)
+
+    expected = np.array([[0 if i == j else reference_te(data[i], data[j], k, l) for j in range(4)] for i in range(4)])
+    np.testing.assert_allclose(te, expected, rtol=1e-10, atol=1e-12)
+    assert te[0, 1] > 0.3
+    np.testing.assert_allclose(transfer_entropy(data[0], data[1], k, l), expected[0, 1], rtol=1e-10)
+
+
+def test_matrix_maps_non_integer_states():
+    data = coupled_data(3, 400, 4)
+    values = np.array([-1.5, 0.25, 2.0, 7.5])
+
+    np.testing.assert_allclose(transfer_entropy_matrix(values[data], 2, 1), transfer_entropy_matrix(data, 2, 1), rtol=1e-12)
+
+
+def test_matrix_matches_pyinform():
+    pyinform = pytest.importorskip('pyinform')
+    data = coupled_data(3, 500, 3)
+
+    te = transfer_entropy_matrix(data, k=2, l=1)
+    for i in range(3):
+        for j in range(3):
+            if i != j:
+                np.testing.assert_allclose(te[i, j], pyinform.transfer_entropy(data[i], data[j], k=2), rtol=1e-8)
+
+
+
+def test_sparse_counting_of_fine_bins_matches_reference():
+    # 1000 bins with k=2, l=2 give 10**15 possible joint states, far beyond dense counting
+    data = coupled_data(3, 3000, 1000)
+
+    te = transfer_entropy_matrix(data, k=2, l=2)
+
+    expected = np.array([[0 if i == j else reference_te(data[i], data[j], 2, 2) for j in range(3)] for i in range(3)])
+    np.testing.assert_allclose(te, expected, rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize('dense_state_limit, max_encoded_states', [(16, 2 ** 62), (16, 50), (2 ** 22, 50)])
+def test_sparse_and_relabelled_paths_match_dense(monkeypatch, dense_state_limit, max_encoded_states):
+    data = coupled_data(4, 800, 5)
+    expected = transfer_entropy_matrix(data, k=3, l=2)
+
+    # Force sorted counting and relabelling of codes to the observed states
+    monkeypatch.setattr(te_module, 'DENSE_STATE_LIMIT', dense_state_limit)
+    monkeypatch.setattr(te_module, 'MAX_ENCODED_STATES', max_encoded_states)
+    np.testing.assert_allclose(transfer_entropy_matrix(data, k=3, l=2), expected, rtol=1e-10, atol=1e-12)
+
+def test_windowed_rejects_data_shorter_than_window():
+    rng = np.random.default_rng(0)
+    source, target = rng.standard_normal((2, 500))
+
+    with pytest.raises(ValueError, match="window_size"):
+        transfer_entropy_windowed(source, target, window_size=1000, step=100)
+
+
+def test_windowed_rejects_non_positive_step():
+    rng = np.random.default_rng(0)
+    source, target = rng.standard_normal((2, 2000))
+
+    with pytest.raises(ValueError, match="step"):
+        transfer_entropy_windowed(source, target, window_size=1000, step=0)
+
+
+def reference_binning(data, num_bins):
+    edges = np.linspace(data.min(), data.max(), num_bins + 1)
+    return np.clip(np.digitize(data, edges[:-1]) - 1, 0, num_bins - 1)
+
+
+@pytest.mark.parametrize('k, l', [(1, 1), (2, 1), (1, 2)])
+@pytest.mark.parametrize('window_size, step', [(300, 100), (301, 37), (200, 250)])
+@pytest.mark.parametrize('rebin_every', [None, 3])
+def test_windowed_matches_reference(k, l, window_size, step, rebin_every):
+    rng = np.random.default_rng(3)
+    source = rng.standard_normal(2000).cumsum()
+    target = np.roll(source, 1) + rng.standard_normal(2000)
+
+    te = transfer_entropy_windowed(source, target, k, l, window_size, step, num_bins=4, rebin_every=rebin_every)
+
+    num_windows = (2000 - window_size) // step + 1
+    rebin_every = rebin_every or num_windows
+    expected = []
+    for first_window in range(0, num_windows, rebin_every):
+        # Bin edges come from all the samples of the windows they are used for
+        last_window = min(first_window + rebin_every, num_windows) - 1
+        span = slice(first_window * step, last_window * step + window_size)
+        binned_source, binned_target = (reference_binning(series[span], 4) for series in (source, target))
+        for w in range(first_window, last_window + 1):
+            window = slice(w * step - span.start, w * step - span.start + window_size)
+            expected.append(reference_te(binned_source[window], binned_target[window], k, l))
+
+    assert te.shape == (num_windows,)
+    np.testing.assert_allclose(te, expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('method', ['shift', 'block'])
+def test_significance_matches_reference(monkeypatch, method):
+    data = coupled_data(3, 300, 3)
+    k, l, num_surrogates, start = 2, 1, 20, 2
+    # Chunks of a few surrogates, so that the chunked generation is exercised
+    monkeypatch.setattr(te_module, 'SURROGATE_CHUNK_BYTES', 3 * data.shape[0] * (data.shape[1] - start) * 8)
+
+    te, p_values, z_scores = transfer_entropy_significance(data, k, l, num_surrogates, method, seed=5, n_jobs=1)
+
+    np.testing.assert_allclose(te, transfer_entropy_matrix(data, k, l), rtol=1e-12, atol=1e-15)
+    seed_sequences = np.random.SeedSequence(5).spawn(3)
+    for target in range(3):
+        indices = surrogate_indices(data.shape[1] - start, num_surrogates, method, np.random.default_rng(seed_sequences[target]))
+        for source in range(3):
+            if source == target:
+                assert np.isnan(p_values[source, target]) and np.isnan(z_scores[source, target])
+                continue
+            surrogate_te = np.array([reference_te(data[source], data[target], k, l, start + row) for row in indices])
+            observed = reference_te(data[source], data[target], k, l)
+            np.testing.assert_allclose(p_values[source, target], (1 + np.sum(surrogate_te >= observed - 1e-12)) / (1 + num_surrogates))
+            np.testing.assert_allclose(z_scores[source, target], (observed - surrogate_te.mean()) / surrogate_te.std(ddof=1), rtol=1e-8)
+    assert p_values[0, 1] == 1 / (1 + num_surrogates)
+
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_significance_does_not_depend_on_n_jobs(backend):
+    data = coupled_data(4, 500, 4)
+    expected = transfer_entropy_significance(data, num_surrogates=30, method='block', seed=11, n_jobs=1)
+
+    with parallel_backend(backend, n_jobs=2):
+        result = transfer_entropy_significance(data, num_surrogates=30, method='block', seed=11)
+
+    for values, expected_values in zip(result, expected):
+        np.testing.assert_array_equal(values, expected_values)
+
+
+def test_significance_rejects_fewer_than_two_surrogates():
+    with pytest.raises(ValueError, match="num_surrogates"):
+        transfer_entropy_significance(coupled_data(2, 100, 2), num_surrogates=1)
+
+
+def test_surrogate_indices():
+    rng = np.random.default_rng(0)
+    shifts = surrogate_indices(100, 5, 'shift', rng, min_shift=10)
+    blocks = surrogate_indices(100, 5, 'block', rng, block_size=7)
+
+    for indices in (shifts, blocks):
+        assert indices.shape == (5, 100)
+        np.testing.assert_array_equal(np.sort(indices, axis=-1), np.tile(np.arange(100), (5, 1)))
+    shift = shifts[:, 0]
+    assert np.all((shift >= 10) & (shift <= 90))
+    np.testing.assert_array_equal(shifts, (np.arange(100) + shift[:, None]) % 100)
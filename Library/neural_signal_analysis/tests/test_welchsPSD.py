@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from welchsPSD.welchsPSD import calculate_psd_chunked, stream_psd
+
+
+@pytest.mark.parametrize('nperseg', [256, 255])
+@pytest.mark.parametrize('noverlap', [None, 0, 100, 200])
+@pytest.mark.parametrize('block_size', [1, 4 * 1001, 4 * 2999, 2 ** 23])
+def test_chunked_matches_welch(tmp_path, nperseg, noverlap, block_size):
+    fs = 250
+    data = np.random.default_rng(0).standard_normal((4, 5003))
+    path = str(tmp_path / 'recording.npy')
+    np.save(path, data)
+
+    frequencies, psd = calculate_psd_chunked(path, fs, nperseg=nperseg, noverlap=noverlap, block_size=block_size)
+    expected_frequencies, expected_psd = signal.welch(data, fs, nperseg=nperseg, noverlap=noverlap)
+
+    np.testing.assert_allclose(frequencies, expected_frequencies)
+    np.testing.assert_allclose(psd, expected_psd, rtol=1e-10, atol=0)
+
+
+def test_chunked_raw_file_and_one_dimensional_input(tmp_path):
+    fs = 250
+    data = np.random.default_rng(1).integers(-1000, 1000, size=(2, 4001)).astype(np.int16)
+    path = str(tmp_path / 'recording.raw')
+    data.tofile(path)
+
+    _, psd = calculate_psd_chunked(path, fs, nperseg=128, block_size=777, dtype=np.int16, num_channels=2)
+    _, expected_psd = signal.welch(data.astype(float), fs, nperseg=128)
+    np.testing.assert_allclose(psd, expected_psd, rtol=1e-10)
+
+    _, psd = calculate_psd_chunked(data[0].astype(float), fs, nperseg=128, block_size=333)
+    np.testing.assert_allclose(psd, expected_psd[0], rtol=1e-10)
+
+
+@pytest.mark.parametrize('nperseg', [256, 255])
+@pytest.mark.parametrize('noverlap', [None, 0, 100])
+@pytest.mark.parametrize('block_sizes', [[50], [1], [37, 500, 3]])
+def test_stream_matches_welch(nperseg, noverlap, block_sizes):
+    fs = 250
+    data = np.random.default_rng(2).standard_normal((3, 5003))
+    bounds = np.cumsum(np.resize(block_sizes, data.shape[-1]))
+    bounds = bounds[bounds < data.shape[-1]]
+    blocks = np.split(data, bounds, axis=-1)
+
+    for frequencies, psd in stream_psd(blocks, fs, nperseg=nperseg, noverlap=noverlap):
+        pass
+    expected_frequencies, expected_psd = signal.welch(data, fs, nperseg=nperseg, noverlap=noverlap)
+
+    np.testing.assert_allclose(frequencies, expected_frequencies)
+    np.testing.assert_allclose(psd, expected_psd, rtol=1e-10, atol=0)
+
+
+def test_invalid_noverlap():
+    data = np.zeros((2, 1000))
+    with pytest.raises(ValueError):
+        calculate_psd_chunked(data, 250, nperseg=128, noverlap=128)
+    with pytest.raises(ValueError):
+        next(stream_psd([data], 250, nperseg=128, noverlap=200))
@@ -0,0 +1,249 @@
+"""
+Time Delay Estimation Module
+
+This module estimates the embedding delay of EEG channels from the average mutual information (AMI) between a signal and its lagged copy. Each channel is discretized once, and the joint histograms of all lags and channels are counted in a single offset-encoded np.bincount, so the AMI curve of every channel is obtained in one vectorized pass. It also provides the delay embedding used by the phase space and transfer entropy modules, as a strided view of the data.
+
+Functions:
+- average_mutual_information(data, max_delay, subsample_factor, num_bins): Computes the AMI for lags 1..max_delay for every channel.
+- autocorrelation(data, max_delay, subsample_factor): Computes the autocorrelation for lags 1..max_delay for every channel.
+- estimate_delay(data, max_delay, subsample_factor, num_bins, criterion, method): Estimates the embedding delay of every channel.
+- embed(data, emb_dim, delay, copy): Returns the delay embedding of every channel as a read-only view of the data.
+
+Example Usage:
+---------------
+import numpy as np
+from time_delay import average_mutual_information, embed, estimate_delay
+
+# Sample EEG data (64 channels x 100000 data points)
+eeg_data = np.random.rand(64, 100000)
+
+# AMI curves of all channels (channels x lags), in bits
+ami = average_mutual_information(eeg_data, max_delay=100, subsample_factor=10)
+
+# Delay of every channel at the first minimum of its AMI
+delays = estimate_delay(eeg_data, max_delay=100, subsample_factor=10)
+
+# Delay at the first zero crossing of the autocorrelation
+delays = estimate_delay(eeg_data, max_delay=100, subsample_factor=10, criterion='autocorrelation_zero')
+
+# 3D embedding of every channel (64 x (100000 - 2 * 10) x 3), without copying the data
+embedded_data = embed(eeg_data, emb_dim=3, delay=10)
+
+Note:
+-----
+Delays are given in samples of the subsampled data (data[::subsample_factor]), as in the determine_delay functions of the phase space and transfer entropy modules, which delegate to estimate_delay. All lags use the same number of sample pairs (N - max_delay), so their AMI values are directly comparable. method='mic' reproduces the former MINE maximal information coefficient curve and requires minepy. Embeddings returned by embed share memory with the data and are read-only; pass copy=True for a writable array.
+"""
+
+import numpy as np
+
+from parallel.parallel import attach_array, parallel_map, share_array
+
+# Largest number of joint codes counted in one np.bincount
+_MAX_CHUNK_CODES = 2 ** 24
+
+def _discretize(data, num_bins):
+    """
+    Bin each channel (last axis) into num_bins equal-width bins spanning its range.
+    """
+    low = data.min(axis=-1, keepdims=True)
+    width = (data.max(axis=-1, keepdims=True) - low) / num_bins
+    width[width == 0] = 1
+    return np.clip(((data - low) / width).astype(np.int64), 0, num_bins - 1)
+
+def _check_length(data, max_delay, subsample_factor):
+    """
+    Raise a ValueError if the subsampled data are too short for max_delay lags.
+    """
+    num_samples = len(range(0, data.shape[-1], subsample_factor))
+    if num_samples <= max_delay:
+        raise ValueError(f"Data of {data.shape[-1]} samples ({num_samples} after subsampling by "
+                         f"{subsample_factor}) is too short for max_delay={max_delay}; "
+                         f"more than {max_delay} subsampled samples are required")
+
+def average_mutual_information(data, max_delay=100, subsample_factor=1, num_bins=16):
+    """
+    Compute the average mutual information between a signal and its lagged copy.
+
+    Parameters:
+    data : array_like
+        One-dimensional time series data or (channels x time series data).
+    max_delay : int, optional
+        Largest lag to consider.
+    subsample_factor : int, optional
+        Factor by which to subsample the data before the analysis.
+    num_bins : int, optional
+        Number of equal-width bins used to discretize each channel.
+
+    Returns:
+    ami : ndarray
+        AMI in bits for lags 1..max_delay, (max_delay,) for one-dimensional
+        input or (channels x max_delay).
+    """
+    data = np.asarray(data, dtype=float)
+    _check_length(data, max_delay, subsample_factor)
+    states = _discretize(np.atleast_2d(data)[:, ::subsample_factor], num_bins)
+    num_channels, N = states.shape
+    n = N - max_delay
+
+    # windows[:, lag, t] is the state at time t + lag, for t < n
+    windows = np.lib.stride_tricks.sliding_window_view(states, n, axis=-1)
+    base = states[:, None, :n] * num_bins
+    num_joint = num_bins * num_bins
+
+    ami = np.empty((num_channels, max_delay))
+    lags_per_chunk = max(1, _MAX_CHUNK_CODES // (num_channels * n))
+    for first in range(1, max_delay + 1, lags_per_chunk):
+        lags = np.arange(first, min(first + lags_per_chunk, max_delay + 1))
+        # One joint histogram per (channel, lag), offset-encoded into one bincount
+        offsets = (np.arange(num_channels)[:, None, None] * lags.size + np.arange(lags.size)[None, :, None]) * num_joint
+        codes = base + windows[:, lags, :] + offsets
+        joint = np.bincount(codes.ravel(), minlength=num_channels * lags.size * num_joint)
+        joint = joint.reshape(num_channels, lags.size, num_bins, num_bins) / n
+
+        p_current = joint.sum(axis=-1, keepdims=True)
+        p_lagged = joint.sum(axis=-2, keepdims=True)
+        ratio = np.divide(joint, p_current * p_lagged, out=np.ones_like(joint), where=joint > 0)
+        ami[:, lags - 1] = np.sum(joint * np.log2(ratio), axis=(-2, -1))
+
+    return ami[0] if data.ndim == 1 else ami
+
+def autocorrelation(data, max_delay=100, subsample_factor=1):
+    """
+    Compute the autocorrelation of each channel for lags 1..max_delay.
+
+    Parameters:
+    data : array_like
+        One-dimensional time series data or (channels x time series data).
+    max_delay : int, optional
+        Largest lag to consider.
+    subsample_factor : int, optional
+        Factor by which to subsample the data before the analysis.
+
+    Returns:
+    acf : ndarray
+        Autocorrelation for lags 1..max_delay, (max_delay,) for
+        one-dimensional input or (channels x max_delay).
+    """
+    data = np.asarray(data, dtype=float)
+    x = np.atleast_2d(data)[:, ::subsample_factor]
+    x = x - x.mean(axis=-1, keepdims=True)
+    n_fft = 1 << int(np.ceil(np.log2(2 * x.shape[-1] - 1)))
+    spectrum = np.fft.rfft(x, n=n_fft, axis=-1)
+    acov = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=n_fft, axis=-1)[:, :max_delay + 1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acf = acov[:, 1:] / acov[:, :1]
+    return acf[0] if data.ndim == 1 else acf
+
+def _mic_worker(args):
+    """
+    Worker function computing the MINE maximal information coefficient of a
+    channel of the shared data and its copy lagged by `lag` samples.
+    """
+    from minepy import MINE
+
+    handle, channel, lag = args
+    channel_data = attach_array(handle)[channel]
+    mine = MINE()
+    mine.compute_score(channel_data[:-lag], channel_data[lag:])
+    return mine.mic()
+
+def _mic_curve(data, max_delay, subsample_factor):
+    """
+    Compute the MIC between each channel and its lagged copy for lags 1..max_delay.
+
+    The lags of all channels are submitted together to the package executor.
+    The subsampled data are shared with the workers once, and each task only
+    names its channel and lag.
+    """
+    subsampled_data = np.ascontiguousarray(np.atleast_2d(data)[:, ::subsample_factor], dtype=float)
+    num_channels = subsampled_data.shape[0]
+    with share_array(subsampled_data) as handle:
+        args_list = [(handle, channel, lag) for channel in range(num_channels) for lag in range(1, max_delay + 1)]
+        mic_values = parallel_map(_mic_worker, args_list, chunksize=max(1, max_delay // 4))
+    return np.array(mic_values).reshape(num_channels, max_delay)
+
+def estimate_delay(data, max_delay=100, subsample_factor=10, num_bins=16, criterion='first_minimum', method='ami'):
+    """
+    Estimate the embedding delay of each channel.
+
+    Parameters:
+    data : array_like
+        One-dimensional time series data or (channels x time series data).
+    max_delay : int, optional
+        Largest delay to consider.
+    subsample_factor : int, optional
+        Factor by which to subsample the data for efficiency.
+    num_bins : int, optional
+        Number of bins for the AMI histograms.
+    criterion : str, optional
+        'first_minimum' (first local minimum of the curve, or its global
+        minimum if it only decreases), 'minimum' (global minimum) or
+        'autocorrelation_zero' (first lag where the autocorrelation is not
+        positive, or the lag of smallest autocorrelation if there is none).
+    method : str, optional
+        Dependence measure for the minimum criteria: 'ami' (average mutual
+        information) or 'mic' (MINE maximal information coefficient,
+        computed per lag on the package executor; requires minepy).
+
+    Returns:
+    optimal_delay : int or ndarray
+        Delay in samples of the subsampled data; an int for one-dimensional
+        input, otherwise one per channel.
+    """
+    data = np.asarray(data, dtype=float)
+    _check_length(data, max_delay, subsample_factor)
+
+    if criterion == 'autocorrelation_zero':
+        acf = np.atleast_2d(autocorrelation(data, max_delay, subsample_factor))
+        crossed = acf <= 0
+        index = np.where(crossed.any(axis=-1), np.argmax(crossed, axis=-1), np.argmin(acf, axis=-1))
+    elif criterion in ('first_minimum', 'minimum'):
+        if method == 'ami':
+            curve = np.atleast_2d(average_mutual_information(data, max_delay, subsample_factor, num_bins))
+        elif method == 'mic':
+            curve = _mic_curve(data, max_delay, subsample_factor)
+        else:
+            raise ValueError(f"Unknown method '{method}', expected 'ami' or 'mic'")
+
+        if criterion == 'minimum':
+            index = np.argmin(curve, axis=-1)
+        else:
+            rising = np.diff(curve, axis=-1) > 0
+            index = np.where(rising.any(axis=-1), np.argmax(rising, axis=-1), np.argmin(curve, axis=-1))
+    else:
+        raise ValueError(f"Unknown criterion '{criterion}', expected 'first_minimum', 'minimum' or 'autocorrelation_zero'")
+
+    delays = index + 1
+    return int(delays[0]) if data.ndim == 1 else delays
+
+def embed(data, emb_dim, delay, copy=False):
+    """
+    Delay-embed each channel as a strided view of the data.
+
+    Row i of the embedding is (x[i], x[i + delay], ..., x[i + (emb_dim - 1) * delay]).
+    The rows are windows of the data itself, so no samples are copied and the
+    cost does not depend on the length of the data.
+
+    Parameters:
+    data : array_like
+        Time series data with time along the last axis, e.g. one-dimensional
+        or (channels x samples).
+    emb_dim : int
+        Embedding dimension.
+    delay : int
+        Delay time steps.
+    copy : bool, optional
+        If True, return a writable, contiguous copy instead of a view.
+
+    Returns:
+    embedded_data : ndarray
+        Embedding of shape (..., samples - (emb_dim - 1) * delay, emb_dim);
+        read-only unless copy is True.
+    """
+    data = np.asarray(data)
+    span = (emb_dim - 1) * delay + 1
+    if span > data.shape[-1]:
+        raise ValueError(f"Embedding span {span} (emb_dim={emb_dim}, delay={delay}) exceeds the {data.shape[-1]} samples of the data")
+
+    embedded_data = np.lib.stride_tricks.sliding_window_view(data, span, axis=-1)[..., ::delay]
+    return embedded_data.copy() if copy else embedded_data
@@ -5,7 +5,7 @@ This module provides functions to compute transfer entropy for EEG data, either
 
 Functions:
 - compute_transfer_entropy(source_data, target_data, k, l): Computes the transfer entropy between two data series.
-- process_granular_eeg_data(eeg_data, fs, num_bins, k, l, eeg_channels, channel_groups): Processes EEG data to calculate transfer entropy for specified channel pairs or groups.
+- process_granular_eeg_data(eeg_data, fs, num_bins, k, l, eeg_channels, channel_groups): Processes EEG data to calculate transfer entropy for specified channel pairs or groups, from one TE matrix over all channels.
 
 Example Usage:
 ---------------
@@ -27,33 +27,19 @@ Transfer entropy is a measure of the directional flow of information between sig
 """
 
 import numpy as np
-import multiprocessing
-from minepy import MINE
-from pyinform import transferentropy
-
-# Function to calculate mutual information
-def mutual_info_worker(args):
-    data1, data2 = args
-    mine = MINE()
-    mine.compute_score(data1, data2)
-    return mine.mic()
-
-# Function to determine the optimal delay using mutual information
+
+from embedding_cache.embedding_cache import cached_delay, cached_embedding
+from time_delay.time_delay import embed, estimate_delay
+from transfer_entropy_matrix.transfer_entropy_matrix import transfer_entropy, transfer_entropy_matrix
+
+# Function to determine the optimal delay from the first minimum of the average mutual information
 def determine_delay(data, max_delay=100, subsample_factor=10):
-    subsampled_data = data[::subsample_factor]
-    with multiprocessing.Pool() as pool:
-        args_list = [(subsampled_data[:-i], subsampled_data[i:]) for i in range(1, max_delay + 1)]
-        mi_values = pool.map(mutual_info_worker, args_list)
-    min_index = np.argmin(mi_values)
-    return min_index + 1
+    return estimate_delay(data, max_delay, subsample_factor)
 
 # Function to perform delay embedding
 def delay_embedding(data, emb_dim, delay):
-    N = len(data)
-    embedded_data = np.zeros((N - (emb_dim - 1) * delay, emb_dim))
-    for i in range(N - (emb_dim - 1) * delay):
-        embedded_data[i] = [data[i + j * delay] for j in range(emb_dim)]
-    return embedded_data
+    # Read-only strided view of the data, (N - (emb_dim - 1) * delay) x emb_dim
+    return embed(data, emb_dim, delay)
 
 # Function to bin data for transfer entropy calculation
 def bin_data(data, num_bins):
@@ -64,7 +50,7 @@ def bin_data(data, num_bins):
 # Function to compute transfer entropy
 def compute_transfer_entropy(source_data, target_data, k, l):
     try:
-        te_value = transferentropy.transferentropy(source_data, target_data, k, l)
+        te_value = transfer_entropy(source_data, target_data, k, l)
         return te_value
     except Exception as e:
         print(f"Error computing Transfer Entropy: {e}")
@@ -87,43 +73,51 @@ def process_granular_eeg_data(eeg_data, fs, num_bins, k, l, eeg_channels, channe
         List of EEG channel names.
     channel_groups : dict (optional)
         Dictionary mapping group names to lists of channel names or indices.
+
+    Returns:
+    te_results : dict
+        Transfer entropy (bits) keyed by "source_to_target".
     """
 
-    # Perform 2D delay embedding on the data
+    # Perform 2D delay embedding on the data; delays and embeddings are shared
+    # with the other phase space and transfer entropy modules through the cache
     embedded_data = []
     for channel_data in eeg_data:
-        optimal_delay = determine_delay(channel_data, fs=fs)
+        optimal_delay = cached_delay(channel_data)
         emb_dim = 2
-        embedded_channel_data = delay_embedding(channel_data, emb_dim=emb_dim, delay=optimal_delay)
+        embedded_channel_data = cached_embedding(channel_data, emb_dim=emb_dim, delay=optimal_delay)
         embedded_data.append(embedded_channel_data[:, 0])  # Using the first dimension
 
     # Prepare channel pairs for TE calculation
     if channel_groups:
         # Use defined channel groups for TE calculation
-        pairs = [(group, source, target) for group, channels in channel_groups.items()
+        pairs = [(source, target) for channels in channel_groups.values()
                  for source in channels for target in channels if source != target]
     else:
         # Use all individual channels for TE calculation
         pairs = [(ch1, ch2) for i, ch1 in enumerate(eeg_channels)
                  for j, ch2 in enumerate(eeg_channels) if i != j]
 
-    # Calculate Transfer Entropy for each pair
+    # Bin every channel once and compute TE for all ordered channel pairs together;
+    # channels are trimmed to a common length since their optimal delays differ
+    length = min(len(data) for data in embedded_data)
+    binned_data = np.array([bin_data(data[:length], num_bins) for data in embedded_data])
+    te_matrix = transfer_entropy_matrix(binned_data, k, l)
+
     te_results = {}
-    for pair in pairs:
-        source_idx = eeg_channels.index(pair[0])
-        target_idx = eeg_channels.index(pair[1])
-        source_data = bin_data(embedded_data[source_idx], num_bins)
-        target_data = bin_data(embedded_data[target_idx], num_bins)
-        te_value = compute_transfer_entropy(source_data, target_data, k, l)
-        te_key = f"{pair[0]}_to_{pair[1]}"
-        te_results[te_key] = te_value
+    for source, target in pairs:
+        source_idx = source if isinstance(source, int) else eeg_channels.index(source)
+        target_idx = target if isinstance(target, int) else eeg_channels.index(target)
+        te_key = f"{source}_to_{target}"
+        te_results[te_key] = float(te_matrix[source_idx, target_idx])
 
     return te_results
 
 # Example usage
 if __name__ == "__main__":
     # Load and preprocess EEG data
-    # eeg_data = ...
+    eeg_data = ...  # Assume EEG data is loaded here
+    eeg_channels = ...  # List of EEG channel names
 
     # Optionally define channel groups for granular TE calculation
     # channel_groups = {
@@ -133,5 +127,5 @@ if __name__ == "__main__":
     # }
 
     # Compute granular transfer entropy
-    te_results = process_granular_eeg_data(eeg_data, fs=1000, num_bins=1000, k=1, l=1, eeg_channels, channel_groups=None)
+    te_results = process_granular_eeg_data(eeg_data, fs=1000, num_bins=1000, k=1, l=1, eeg_channels=eeg_channels, channel_groups=None)
     print(te_results)
\ No newline at end of file
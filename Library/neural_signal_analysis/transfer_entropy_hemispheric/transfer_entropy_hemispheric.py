@@ -29,30 +29,18 @@ Transfer entropy is a measure of the directional flow of information between sig
 """
 
 import numpy as np
-import multiprocessing
-from minepy import MINE
-from pyinform import transferentropy
 
-def mutual_info_worker(args):
-    data1, data2 = args
-    mine = MINE()
-    mine.compute_score(data1, data2)
-    return mine.mic()
+from embedding_cache.embedding_cache import cached_delay, cached_embedding
+from time_delay.time_delay import embed, estimate_delay
+from transfer_entropy_matrix.transfer_entropy_matrix import transfer_entropy
 
 def determine_delay(data, max_delay=100, subsample_factor=10):
-    subsampled_data = data[::subsample_factor]
-    with multiprocessing.Pool() as pool:
-        args_list = [(subsampled_data[:-i], subsampled_data[i:]) for i in range(1, max_delay + 1)]
-        mi_values = pool.map(mutual_info_worker, args_list)
-    min_index = np.argmin(mi_values)
-    return min_index + 1
+    # First minimum of the average mutual information, all lags in one pass
+    return estimate_delay(data, max_delay, subsample_factor)
 
 def delay_embedding(data, emb_dim, delay):
-    N = len(data)
-    embedded_data = np.zeros((N - (emb_dim - 1) * delay, emb_dim))
-    for i in range(N - (emb_dim - 1) * delay):
-        embedded_data[i] = [data[i + j * delay] for j in range(emb_dim)]
-    return embedded_data
+    # Read-only strided view of the data, (N - (emb_dim - 1) * delay) x emb_dim
+    return embed(data, emb_dim, delay)
 
 def bin_data(data, num_bins):
     hist, bins = np.histogram(data, bins=num_bins)
@@ -61,7 +49,7 @@ def bin_data(data, num_bins):
 
 def compute_transfer_entropy(source_data, target_data, k, l):
     try:
-        te_value = transferentropy.transferentropy(source_data, target_data, k, l)
+        te_value = transfer_entropy(source_data, target_data, k, l)
         return te_value
     except Exception as e:
         print(f"Error computing Transfer Entropy: {e}")
@@ -88,14 +76,17 @@ def process_eeg_data(eeg_data, fs, num_bins, k, l, eeg_channels, left_channels,
         List of right hemisphere channel names.
     """
 
+    # Delays and embeddings are shared with the other modules through the cache
     embedded_data = []
     for channel_data in eeg_data:
-        optimal_delay = determine_delay(channel_data, max_delay=100, subsample_factor=10)
+        optimal_delay = cached_delay(channel_data, max_delay=100, subsample_factor=10)
         emb_dim = 2
-        embedded_channel_data = delay_embedding(channel_data, emb_dim=emb_dim, delay=optimal_delay)
+        embedded_channel_data = cached_embedding(channel_data, emb_dim=emb_dim, delay=optimal_delay)
         embedded_data.append(embedded_channel_data[:, 0])
 
-    binned_data = [bin_data(data, num_bins) for data in embedded_data]
+    # Channels are trimmed to a common length since their optimal delays differ
+    length = min(len(data) for data in embedded_data)
+    binned_data = [bin_data(data[:length], num_bins) for data in embedded_data]
 
     left_hemisphere_indices = [eeg_channels.index(ch) for ch in left_channels]
     right_hemisphere_indices = [eeg_channels.index(ch) for ch in right_channels]
@@ -0,0 +1,478 @@
+"""
+Transfer Entropy Matrix Module
+
+This module provides a native histogram estimator of transfer entropy (TE) between binned signals. Each sample is encoded as an integer state (target future, target history of length k, source history of length l), joint states are counted with np.bincount, and the TE of all ordered channel pairs is returned as one matrix. The target-only terms are computed once per target and shared by all sources. Large state spaces (many bins or long histories) are counted sparsely, so memory scales with the observed states rather than the possible ones.
+
+Functions:
+- transfer_entropy(source_data, target_data, k, l): Computes the transfer entropy from one binned series to another.
+- transfer_entropy_matrix(binned_data, k, l): Computes the transfer entropy between all ordered pairs of channels.
+- transfer_entropy_windowed(source_data, target_data, k, l, window_size, step, num_bins, rebin_every): Computes a transfer entropy time series over sliding windows, updating the state counts incrementally.
+- surrogate_indices(n, num_surrogates, method, rng, block_size, min_shift): Generates time-shift or block-shuffle surrogates as index arrays.
+- transfer_entropy_significance(binned_data, k, l, num_surrogates, method, block_size, min_shift, seed, n_jobs): Computes the TE matrix with surrogate p-values and z-scores for every ordered channel pair.
+
+Example Usage:
+---------------
+import numpy as np
+from transfer_entropy_matrix import (transfer_entropy, transfer_entropy_matrix, transfer_entropy_windowed,
+                                     transfer_entropy_significance)
+
+# Binned EEG data (64 channels x 10000 samples, 10 bins)
+binned_data = np.random.randint(0, 10, size=(64, 10000))
+
+# TE from every channel (rows) to every other channel (columns), in bits
+te = transfer_entropy_matrix(binned_data, k=1, l=1)
+
+# TE from channel 0 to channel 1
+te_0_to_1 = transfer_entropy(binned_data[0], binned_data[1], k=2, l=1)
+
+# Fine binning with longer histories is counted sparsely (1000 bins, k=2, l=2)
+fine_data = np.random.randint(0, 1000, size=(8, 100000))
+te_fine = transfer_entropy_matrix(fine_data, k=2, l=2)
+
+# Time-resolved TE between two (continuous) signals: 2 s windows every 100 ms at 1000 Hz
+left, right = np.random.rand(2, 600000)
+te_trace = transfer_entropy_windowed(left, right, k=1, l=1, window_size=2000, step=100, num_bins=10)
+
+# Significance of every pair against 1000 time-shifted source surrogates, in parallel over targets
+te, p_values, z_scores = transfer_entropy_significance(binned_data, k=1, l=1, num_surrogates=1000, seed=42)
+significant = p_values < 0.05
+
+Note:
+-----
+TE is computed in bits as H(Y+, Yk) - H(Yk) - H(Y+, Yk, Xl) + H(Yk, Xl), where Y+ is the next target sample, Yk the last k target samples and Xl the last l source samples, with all probabilities estimated from state counts. With l=1 this matches pyinform's transfer_entropy(source, target, k). Integer data are used as states directly; other discrete data (e.g. averages of binned channels) are first mapped to states by their distinct values.
+"""
+
+import numpy as np
+
+from parallel.parallel import attach_array, parallel_map, share_array
+
+# Largest number of possible states (over all rows) counted with a dense np.bincount
+DENSE_STATE_LIMIT = 2 ** 22
+# Largest number of possible joint states encoded without relabelling to the observed states
+MAX_ENCODED_STATES = 2 ** 62
+# Approximate size in bytes of the encoded source histories of one chunk of surrogates
+SURROGATE_CHUNK_BYTES = 2 ** 25
+
+def _as_states(data):
+    """
+    Return discrete data as non-negative integer states and the number of states.
+    """
+    data = np.asarray(data)
+    if np.issubdtype(data.dtype, np.integer) and (data.size == 0 or data.min() >= 0):
+        return data.astype(np.int64, copy=False), int(data.max()) + 1 if data.size else 1
+    values, states = np.unique(data, return_inverse=True)
+    return states.reshape(data.shape).astype(np.int64), values.size
+
+def _compact(codes):
+    """
+    Relabel integer codes by their rank among the observed codes.
+    """
+    values, inverse = np.unique(codes, return_inverse=True)
+    return inverse.reshape(codes.shape).astype(np.int64), values.size
+
+def _combine(high, num_high, low, num_low):
+    """
+    Encode pairs of codes (high, low) as one integer code high * num_low + low.
+
+    The two arrays are broadcast against each other, so a single target row
+    can be paired with the codes of many sources without copying it.
+
+    If the number of possible pairs does not fit in int64, the codes are first
+    relabelled to the observed ones, so the code range grows with the
+    observed states rather than the possible ones.
+    """
+    if num_high * num_low > MAX_ENCODED_STATES:
+        high, num_high = _compact(high)
+    if num_high * num_low > MAX_ENCODED_STATES:
+        low, num_low = _compact(low)
+    return high * num_low + low, num_high * num_low
+
+def _history_codes(states, length, num_states, start):
+    """
+    Encode the last `length` states before each time step t >= start as one
+    integer, for data with time along the last axis.
+
+    Returns the codes and the number of possible codes.
+    """
+    n = states.shape[-1] - start
+    codes, num_codes = np.zeros(states.shape[:-1] + (n,), dtype=np.int64), 1
+    for lag in range(length):
+        codes, num_codes = _combine(codes, num_codes, states[..., start - 1 - lag:start - 1 - lag + n], num_states)
+    return codes, num_codes
+
+def _sum_c_log_c(counts):
+    counts = counts.astype(float)
+    return np.sum(counts * np.log2(counts, out=np.zeros_like(counts), where=counts > 0), axis=-1)
+
+def _entropy_from_codes(codes, num_codes):
+    """
+    Return the entropy in bits of the states encoded along the last axis.
+
+    Small state spaces are counted densely with np.bincount, in groups of
+    rows whose possible codes fit in DENSE_STATE_LIMIT. When a single row has
+    more possible codes than that, or many more than samples, each row is
+    sorted instead and the runs of equal codes are counted, so memory grows
+    with the number of samples rather than the number of possible states.
+    """
+    rows = codes.reshape(-1, codes.shape[-1])
+    num_rows, n = rows.shape
+
+    if num_rows * num_codes <= DENSE_STATE_LIMIT or (num_codes <= DENSE_STATE_LIMIT and num_codes <= 4 * n):
+        rows_per_group = max(1, DENSE_STATE_LIMIT // num_codes)
+        sum_c_log_c = np.empty(num_rows)
+        for first in range(0, num_rows, rows_per_group):
+            group = rows[first:first + rows_per_group]
+            offsets = np.arange(group.shape[0], dtype=np.int64)[:, None] * num_codes
+            counts = np.bincount((group + offsets).ravel(), minlength=group.shape[0] * num_codes)
+            sum_c_log_c[first:first + group.shape[0]] = _sum_c_log_c(counts.reshape(group.shape[0], num_codes))
+    else:
+        ordered = np.sort(rows, axis=-1)
+        run_starts = np.ones(ordered.shape, dtype=bool)
+        run_starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+        run_starts = np.flatnonzero(run_starts)
+        run_lengths = np.diff(np.append(run_starts, num_rows * n)).astype(float)
+        sum_c_log_c = np.bincount(run_starts // n, weights=run_lengths * np.log2(run_lengths), minlength=num_rows)
+
+    return (np.log2(n) - sum_c_log_c / n).reshape(codes.shape[:-1])
+
+def _source_terms(target_joint, num_target_joint, target_history, num_target_history, source_history, num_source_history):
+    """
+    Return the source-dependent TE terms H(Yk, Xl) - H(Y+, Yk, Xl) of one
+    target for every row of encoded source histories.
+    """
+    history_source, num_history_source = _combine(target_history, num_target_history, source_history, num_source_history)
+    joint, num_joint = _combine(target_joint, num_target_joint, source_history, num_source_history)
+    return _entropy_from_codes(history_source, num_history_source) - _entropy_from_codes(joint, num_joint)
+
+def transfer_entropy(source_data, target_data, k=1, l=1):
+    """
+    Compute the transfer entropy from a source series to a target series.
+
+    Parameters:
+    source_data : array_like
+        Binned (discrete) source time series.
+    target_data : array_like
+        Binned (discrete) target time series of the same length.
+    k : int, optional
+        Length of the target history (default: 1).
+    l : int, optional
+        Length of the source history (default: 1).
+
+    Returns:
+    te_value : float
+        Transfer entropy from source to target, in bits.
+    """
+    te = transfer_entropy_matrix(np.stack((np.asarray(source_data), np.asarray(target_data))), k=k, l=l)
+    return float(te[0, 1])
+
+def transfer_entropy_matrix(binned_data, k=1, l=1):
+    """
+    Compute the transfer entropy between all ordered pairs of channels.
+
+    For each target, the target history and future states and the entropy
+    terms H(Y+, Yk) - H(Yk) are computed once; the joint states with the
+    history of every source are then counted together.
+
+    Parameters:
+    binned_data : array_like
+        Binned (discrete) data (channels x time series data).
+    k : int, optional
+        Length of the target history (default: 1).
+    l : int, optional
+        Length of the source history (default: 1).
+
+    Returns:
+    te : ndarray
+        Transfer entropy matrix (channels x channels) in bits, where
+        te[i, j] is the TE from channel i to channel j. The diagonal is zero.
+    """
+    states, num_states = _as_states(binned_data)
+    num_channels = states.shape[0]
+    start = max(k, l)
+
+    target_history, num_target_history = _history_codes(states, k, num_states, start)
+    target_future = states[:, start:]
+    source_history, num_source_history = _history_codes(states, l, num_states, start)
+
+    # Target-only terms, shared by all sources
+    target_joint, num_target_joint = _combine(target_history, num_target_history, target_future, num_states)
+    target_terms = _entropy_from_codes(target_joint, num_target_joint) - _entropy_from_codes(target_history, num_target_history)
+
+    te = np.zeros((num_channels, num_channels))
+    for target in range(num_channels):
+        te[:, target] = target_terms[target] + _source_terms(
+            target_joint[target], num_target_joint, target_history[target], num_target_history,
+            source_history, num_source_history)
+
+    np.fill_diagonal(te, 0)
+    return te
+
+def _xlog2x(counts):
+    counts = np.asarray(counts, dtype=float)
+    return counts * np.log2(counts, out=np.zeros_like(counts), where=counts > 0)
+
+def _windowed_entropies(codes, window_terms, step, num_windows):
+    """
+    Yield the entropy in bits of the codes in each sliding window, updating
+    the counts and their sum of c*log2(c) with only the entering and leaving
+    codes.
+    """
+    labels, num_labels = _compact(codes)
+    counts = np.bincount(labels[:window_terms], minlength=num_labels).astype(float)
+    sum_c_log_c = np.sum(_xlog2x(counts))
+    yield np.log2(window_terms) - sum_c_log_c / window_terms
+
+    for w in range(1, num_windows):
+        start = (w - 1) * step
+        leaving = labels[start:min(start + window_terms, start + step)]
+        entering = labels[max(start + window_terms, start + step):start + step + window_terms]
+
+        changed, inverse = np.unique(np.concatenate((entering, leaving)), return_inverse=True)
+        delta = np.bincount(inverse, weights=np.concatenate((np.ones(entering.size), -np.ones(leaving.size))))
+        old_counts = counts[changed]
+        counts[changed] = old_counts + delta
+        sum_c_log_c += np.sum(_xlog2x(counts[changed])) - np.sum(_xlog2x(old_counts))
+
+        yield np.log2(window_terms) - sum_c_log_c / window_terms
+
+def _bin_with_edges(data, num_bins):
+    """
+    Bin data into num_bins equal-width bins spanning its range.
+    """
+    edges = np.linspace(np.min(data), np.max(data), num_bins + 1)
+    return np.clip(np.digitize(data, edges[:-1]) - 1, 0, num_bins - 1)
+
+def transfer_entropy_windowed(source_data, target_data, k=1, l=1, window_size=1000, step=100, num_bins=10, rebin_every=None):
+    """
+    Compute a transfer entropy time series over sliding windows.
+
+    The joint and marginal state counts are kept from one window to the
+    next: for every step, the states of the samples entering the window are
+    added and those of the samples leaving it are removed, together with
+    their contribution to each entropy. The work per window is therefore
+    proportional to the step, not the window size. Each window gives the same
+    TE as transfer_entropy on that window of the binned data.
+
+    Parameters:
+    source_data : array_like
+        Source time series (continuous).
+    target_data : array_like
+        Target time series (continuous) of the same length.
+    k : int, optional
+        Length of the target history (default: 1).
+    l : int, optional
+        Length of the source history (default: 1).
+    window_size : int, optional
+        Length of each window in samples.
+    step : int, optional
+        Number of samples between the starts of consecutive windows.
+    num_bins : int, optional
+        Number of equal-width bins for each signal.
+    rebin_every : int, optional
+        If None, the bin edges are fixed over the whole recording. Otherwise
+        the edges are recomputed every rebin_every windows from the data
+        those windows cover, and the counts are rebuilt at that point.
+
+    Returns:
+    te : ndarray
+        Transfer entropy from source to target (bits) for each window.
+        Window i covers samples i*step to i*step + window_size.
+    """
+    data = np.stack((np.asarray(source_data), np.asarray(target_data)))
+    if step <= 0:
+        raise ValueError(f"step must be positive, got {step}")
+    if window_size > data.shape[-1]:
+        raise ValueError(f"window_size {window_size} exceeds the {data.shape[-1]} samples of the data")
+    num_windows = (data.shape[-1] - window_size) // step + 1
+    rebin_every = rebin_every or num_windows
+    start = max(k, l)
+    window_terms = window_size - start
+
+    te = np.empty(num_windows)
+    for first_window in range(0, num_windows, rebin_every):
+        block_windows = min(rebin_every, num_windows - first_window)
+        span = data[:, first_window * step:(first_window + block_windows - 1) * step + window_size]
+        states = np.stack([_bin_with_edges(channel, num_bins) for channel in span]).astype(np.int64)
+
+        target_history, num_target_history = _history_codes(states[1], k, num_bins, start)
+        target_future = states[1, start:]
+        source_history, num_source_history = _history_codes(states[0], l, num_bins, start)
+
+        target_joint, num_target_joint = _combine(target_history, num_target_history, target_future, num_bins)
+        history_source, _ = _combine(target_history, num_target_history, source_history, num_source_history)
+        joint, _ = _combine(target_joint, num_target_joint, source_history, num_source_history)
+
+        entropies = zip(*(_windowed_entropies(codes, window_terms, step, block_windows)
+                          for codes in (target_joint, target_history, joint, history_source)))
+        for w, (h_target_joint, h_target_history, h_joint, h_history_source) in enumerate(entropies):
+            te[first_window + w] = h_target_joint - h_target_history - h_joint + h_history_source
+
+    return te
+
+def _surrogate_chunks(n, num_surrogates, method='shift', rng=None, block_size=None, min_shift=None, chunk=None):
+    """
+    Return a generator of surrogate source time indices in chunks of at most
+    `chunk` surrogates (default: all at once); see surrogate_indices.
+
+    The random draws do not depend on the chunk size, so the surrogates are
+    the same for any chunking. Only the shifts (or the block permutations) of
+    the current chunk are expanded into index arrays.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    chunk = chunk or max(num_surrogates, 1)
+
+    if method == 'shift':
+        min_shift = n // 10 if min_shift is None else min_shift
+        shifts = rng.integers(min_shift, n - min_shift + 1, size=num_surrogates)
+        return ((np.arange(n) + shifts[first:first + chunk, None]) % n for first in range(0, num_surrogates, chunk))
+    if method == 'block':
+        block_size = max(1, n // 20) if block_size is None else block_size
+        blocks = np.array_split(np.arange(n), np.arange(block_size, n, block_size))
+        return (np.array([np.concatenate([blocks[b] for b in rng.permutation(len(blocks))])
+                          for _ in range(min(chunk, num_surrogates - first))])
+                for first in range(0, num_surrogates, chunk))
+    raise ValueError(f"Unknown surrogate method '{method}', expected 'shift' or 'block'")
+
+def surrogate_indices(n, num_surrogates, method='shift', rng=None, block_size=None, min_shift=None):
+    """
+    Generate surrogate source time indices.
+
+    Indexing the source with a row of the result gives one surrogate that
+    keeps the source's own dynamics but destroys its timing relative to the
+    target.
+
+    Parameters:
+    n : int
+        Number of time steps.
+    num_surrogates : int
+        Number of surrogates.
+    method : str, optional
+        'shift' for circular time shifts, or 'block' for random permutations
+        of contiguous blocks.
+    rng : numpy.random.Generator, optional
+        Random number generator (default: a new unseeded generator).
+    block_size : int, optional
+        With method='block', length of the blocks (default: n // 20).
+    min_shift : int, optional
+        With method='shift', smallest shift in either direction (default: n // 10).
+
+    Returns:
+    indices : ndarray
+        Time indices (num_surrogates x n).
+    """
+    chunks = list(_surrogate_chunks(n, num_surrogates, method, rng, block_size, min_shift))
+    return np.concatenate(chunks) if chunks else np.empty((0, n), dtype=np.int64)
+
+def _surrogate_worker(args):
+    """
+    Compute the observed and surrogate TE from all sources to one target.
+
+    The target-only entropy terms are computed once by the caller and are
+    the same for the observed and every surrogate TE, so only the
+    source-dependent terms are evaluated here. Surrogates are generated and
+    evaluated in chunks of about SURROGATE_CHUNK_BYTES of encoded source
+    histories, so memory does not grow with num_surrogates. The encoded
+    histories are read from shared arrays; only the target index and its
+    terms are sent.
+    """
+    (target, joint_handle, num_target_joint, target_history_handle, num_target_history,
+     source_history_handle, num_source_history, target_terms, num_surrogates, method,
+     block_size, min_shift, seed_sequence) = args
+
+    target_joint = attach_array(joint_handle)[target]
+    target_history = attach_array(target_history_handle)[target]
+    source_history = attach_array(source_history_handle)
+    num_channels, n = source_history.shape
+    observed_te = target_terms + _source_terms(target_joint, num_target_joint, target_history, num_target_history,
+                                               source_history, num_source_history)
+
+    chunk = max(1, SURROGATE_CHUNK_BYTES // (num_channels * n * source_history.itemsize))
+    rng = np.random.default_rng(seed_sequence)
+    surrogate_te = np.empty((num_channels, num_surrogates))
+    first = 0
+    for indices in _surrogate_chunks(n, num_surrogates, method, rng, block_size, min_shift, chunk):
+        # (sources x surrogates of the chunk x time)
+        shuffled = source_history[:, indices]
+        surrogate_te[:, first:first + len(indices)] = target_terms + _source_terms(
+            target_joint, num_target_joint, target_history, num_target_history, shuffled, num_source_history)
+        first += len(indices)
+    return observed_te, surrogate_te
+
+def transfer_entropy_significance(binned_data, k=1, l=1, num_surrogates=1000, method='shift',
+                                  block_size=None, min_shift=None, seed=None, n_jobs=None):
+    """
+    Compute the TE matrix with surrogate significance tests for every pair.
+
+    Surrogates are generated as index arrays into the encoded source
+    histories (time shifts or block shuffles), so no data are copied or
+    re-binned per surrogate. For each target, all surrogates of all sources
+    are evaluated against the target terms that were computed once for the
+    observed TE. Targets are processed in parallel, each with its own random
+    stream spawned from `seed`, so results do not depend on n_jobs.
+
+    Parameters:
+    binned_data : array_like
+        Binned (discrete) data (channels x time series data).
+    k : int, optional
+        Length of the target history (default: 1).
+    l : int, optional
+        Length of the source history (default: 1).
+    num_surrogates : int, optional
+        Number of surrogates per pair (default: 1000); at least 2.
+    method : str, optional
+        'shift' (circular source time shifts) or 'block' (source block shuffles).
+    block_size : int, optional
+        Block length for method='block', see surrogate_indices.
+    min_shift : int, optional
+        Smallest shift for method='shift', see surrogate_indices.
+    seed : int, optional
+        Seed for reproducible surrogates.
+    n_jobs : int, optional
+        Number of workers (default: the configured package executor, see
+        parallel.parallel_backend). Use 1 to compute in the calling process.
+
+    Returns:
+    te : ndarray
+        Transfer entropy matrix (channels x channels) in bits, te[i, j] from
+        channel i to channel j.
+    p_values : ndarray
+        Fraction of surrogates with TE at least the observed one, as
+        (1 + count) / (1 + num_surrogates). NaN on the diagonal.
+    z_scores : ndarray
+        (te - surrogate mean) / surrogate standard deviation. NaN on the diagonal.
+    """
+    if num_surrogates < 2:
+        raise ValueError(f"num_surrogates must be at least 2, got {num_surrogates}")
+    if method not in ('shift', 'block'):
+        raise ValueError(f"Unknown surrogate method '{method}', expected 'shift' or 'block'")
+    states, num_states = _as_states(binned_data)
+    num_channels = states.shape[0]
+    start = max(k, l)
+
+    target_history, num_target_history = _history_codes(states, k, num_states, start)
+    source_history, num_source_history = _history_codes(states, l, num_states, start)
+    target_joint, num_target_joint = _combine(target_history, num_target_history, states[:, start:], num_states)
+    target_terms = _entropy_from_codes(target_joint, num_target_joint) - _entropy_from_codes(target_history, num_target_history)
+
+    seed_sequences = np.random.SeedSequence(seed).spawn(num_channels)
+    # The encoded histories are shared once instead of being pickled into every task
+    with share_array(target_joint, n_jobs=n_jobs) as joint_handle, \
+            share_array(target_history, n_jobs=n_jobs) as target_history_handle, \
+            share_array(source_history, n_jobs=n_jobs) as source_history_handle:
+        tasks = [(target, joint_handle, num_target_joint, target_history_handle, num_target_history,
+                  source_history_handle, num_source_history, target_terms[target], num_surrogates, method,
+                  block_size, min_shift, seed_sequences[target])
+                 for target in range(num_channels)]
+        results = parallel_map(_surrogate_worker, tasks, n_jobs=n_jobs)
+    # The observed TE comes from the same codes as the surrogates; (sources x targets)
+    te = np.stack([observed_te for observed_te, _ in results], axis=1)
+    np.fill_diagonal(te, 0)
+    # (sources x targets x surrogates)
+    surrogate_te = np.stack([target_surrogate_te for _, target_surrogate_te in results], axis=1)
+
+    p_values = (1 + np.sum(surrogate_te >= te[..., None], axis=-1)) / (1 + num_surrogates)
+    z_scores = (te - surrogate_te.mean(axis=-1)) / surrogate_te.std(axis=-1, ddof=1)
+    np.fill_diagonal(p_values, np.nan)
+    np.fill_diagonal(z_scores, np.nan)
+
+    return te, p_values, z_scores
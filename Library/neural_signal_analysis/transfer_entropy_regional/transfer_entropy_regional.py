@@ -31,26 +31,17 @@ Transfer entropy is a useful measure in EEG analysis for exploring the connectiv
 """
 
 import numpy as np
-import multiprocessing
-from minepy import MINE
-from pyinform import transferentropy
 
-def mutual_info_worker(args):
-    data1, data2 = args
-    mine = MINE()
-    mine.compute_score(data1, data2)
-    return mine.mic()
+from time_delay.time_delay import embed, estimate_delay
+from transfer_entropy_matrix.transfer_entropy_matrix import transfer_entropy, transfer_entropy_matrix
 
 def determine_delay(data, max_delay=100, subsample_factor=10):
-    subsampled_data = data[::subsample_factor]
-    with multiprocessing.Pool() as pool:
-        args_list = [(subsampled_data[:-i], subsampled_data[i:]) for i in range(1, max_delay + 1)]
-        mi_values = pool.map(mutual_info_worker, args_list)
-    return np.argmin(mi_values) + 1
+    # First minimum of the average mutual information, all lags in one pass
+    return estimate_delay(data, max_delay, subsample_factor)
 
 def delay_embedding(data, emb_dim, delay):
-    N = len(data)
-    return np.array([data[i:i + emb_dim * delay:delay] for i in range(N - (emb_dim - 1) * delay)])
+    # Read-only strided view of the data, (N - (emb_dim - 1) * delay) x emb_dim
+    return embed(data, emb_dim, delay)
 
 def bin_data(data, num_bins):
     bins = np.linspace(np.min(data), np.max(data), num_bins + 1)
@@ -58,7 +49,7 @@ def bin_data(data, num_bins):
 
 def compute_transfer_entropy(source_data, target_data, k, l):
     try:
-        return transferentropy.transferentropy(source_data, target_data, k, l)
+        return transfer_entropy(source_data, target_data, k, l)
     except Exception as e:
         print(f"Error computing Transfer Entropy: {e}")
         return None
@@ -80,6 +71,10 @@ def process_eeg_data(eeg_data, fs, num_bins, k, l, eeg_channels, regions):
         List of EEG channel names.
     regions : dict
         Dictionary mapping region names to lists of channel names or indices.
+
+    Returns:
+    te_results : dict
+        Transfer entropy (bits) keyed by "source_to_target" region names.
     """
 
     # Prepare data for each region
@@ -91,14 +86,17 @@ def process_eeg_data(eeg_data, fs, num_bins, k, l, eeg_channels, regions):
         embedded_region_eeg = delay_embedding(region_eeg, emb_dim=2, delay=optimal_delay)
         region_data[region_name] = bin_data(embedded_region_eeg[:, 0], num_bins)
 
-    # Calculate Transfer Entropy between regions
+    # Calculate Transfer Entropy between all regions at once, on a common length
+    region_names = list(region_data)
+    length = min(len(data) for data in region_data.values())
+    te_matrix = transfer_entropy_matrix(np.array([region_data[name][:length] for name in region_names]), k, l)
+
     te_results = {}
-    for source_region, source_data in region_data.items():
-        for target_region, target_data in region_data.items():
+    for i, source_region in enumerate(region_names):
+        for j, target_region in enumerate(region_names):
             if source_region != target_region:
-                te_value = compute_transfer_entropy(source_data, target_data, k, l)
                 te_key = f"{source_region}_to_{target_region}"
-                te_results[te_key] = te_value
+                te_results[te_key] = float(te_matrix[i, j])
 
     return te_results
 
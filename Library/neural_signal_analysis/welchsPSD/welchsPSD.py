@@ -5,13 +5,16 @@ This module provides functions to compute and visualize the Power Spectral Densi
 
 Functions:
 - calculate_psd(data, fs, nperseg): Calculates the Power Spectral Density of the provided data.
+- calculate_psd_chunked(source, fs, nperseg, noverlap, block_size, dtype, num_channels): Calculates the Welch PSD of a memory-mapped recording in time blocks with bounded memory.
+- stream_psd(blocks, fs, nperseg, noverlap, forgetting_factor): Keeps a running Welch PSD up to date from a stream of multi-channel sample blocks.
+- draw_psd(ax, frequencies, psd, channel_name): Draws the Power Spectral Density of a channel on the given axes.
 - plot_psd(frequencies, psd, channel_name): Plots the Power Spectral Density for a given channel.
-- process_eeg_data(eeg_data, fs, nperseg): Processes EEG data to calculate and plot PSD for each channel.
+- process_eeg_data(eeg_data, fs, nperseg, output_dir, montage, n_jobs): Processes EEG data to calculate and plot PSD for each channel, optionally rendering headless to files.
 
 Example Usage:
 ---------------
 import numpy as np
-from welchsPSD import process_eeg_data
+from welchsPSD import process_eeg_data, calculate_psd_chunked, stream_psd
 
 # Sample EEG data (3 channels x 1000 data points)
 eeg_data = np.random.rand(3, 1000)
@@ -20,6 +23,19 @@ fs = 250  # Sampling frequency in Hz
 # Process EEG data and plot Power Spectral Density
 process_eeg_data(eeg_data, fs)
 
+# Headless: save one image per channel and keep the numeric results
+frequencies, psd = process_eeg_data(eeg_data, fs, output_dir='/path/to/save/plots')
+
+# Out-of-core: Welch PSD of a (channels x samples) recording that does not fit in memory
+frequencies, psd = calculate_psd_chunked('/path/to/recording.npy', fs=20000, nperseg=4096)
+frequencies, psd = calculate_psd_chunked('/path/to/recording.raw', fs=20000, nperseg=4096, dtype=np.int16, num_channels=256)
+
+# Streaming: running Welch PSD over 50 ms blocks of 64 channels with exponential forgetting
+blocks = (np.random.rand(64, 50) for _ in range(1000))  # e.g. a generator reading the acquisition ring buffer
+for frequencies, psd in stream_psd(blocks, fs=1000, nperseg=250, forgetting_factor=0.1):
+    if psd is not None:
+        alpha_power = psd[:, (frequencies >= 8) & (frequencies < 13)].sum(axis=-1)
+
 Note:
 -----
 PSD is a key measure in EEG analysis for understanding the frequency content of EEG signals. Welch's method is a widely used approach for estimating PSD.
@@ -29,13 +45,16 @@ import numpy as np
 from scipy import signal
 import matplotlib.pyplot as plt
 
+from batch_rendering.batch_rendering import render_panels
+
 def calculate_psd(data, fs, nperseg=1024):
     """
     Calculate Power Spectral Density using Welch's method.
 
     Parameters:
     data : array_like
-        One-dimensional time series data.
+        Time series data with time along the last axis, either one-dimensional
+        or (channels x time series data).
     fs : float
         Sampling frequency of the data.
     nperseg : int, optional
@@ -45,11 +64,192 @@ def calculate_psd(data, fs, nperseg=1024):
     frequencies : ndarray
         Array of sample frequencies.
     psd : ndarray
-        Power spectral density of data.
+        Power spectral density of data (one row per channel for 2D input).
     """
     frequencies, psd = signal.welch(data, fs, nperseg=nperseg)
     return frequencies, psd
 
+def _segment_periodograms(segments, fs, window):
+    """
+    Compute the one-sided, density-scaled periodogram of each segment along the
+    last axis, with the same mean detrending and scaling as signal.welch.
+    """
+    nperseg = segments.shape[-1]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    spectrum = np.fft.rfft(segments * window, axis=-1)
+    periodograms = (spectrum.real ** 2 + spectrum.imag ** 2) / (fs * np.sum(window ** 2))
+    if nperseg % 2:
+        periodograms[..., 1:] *= 2
+    else:
+        periodograms[..., 1:-1] *= 2
+    return periodograms
+
+def calculate_psd_chunked(source, fs, nperseg=1024, noverlap=None, block_size=2**23, dtype=None, num_channels=None):
+    """
+    Calculate Power Spectral Density using Welch's method over a recording that
+    is read in time blocks, e.g. a memory-mapped file that does not fit in memory.
+
+    Each block covers a whole number of Welch segments and re-reads the
+    segment overlap at its start, so segments spanning a block boundary are
+    included exactly once. The periodograms are summed as the blocks are
+    processed, and only one block is held in memory at a time. The result
+    matches calculate_psd on the full recording.
+
+    Parameters:
+    source : str or array_like
+        Path to a (channels x samples) .npy file, path to a raw binary file
+        (channels x samples, C order), or an array such as np.memmap.
+    fs : float
+        Sampling frequency of the data.
+    nperseg : int, optional
+        Length of each segment for Welch's method.
+    noverlap : int, optional
+        Number of samples shared by consecutive segments (default: nperseg // 2).
+    block_size : int, optional
+        Approximate number of samples read per block, summed over all
+        channels, so that memory use does not grow with the channel count
+        (the default is 64 MB of float64 per block). A block always holds at
+        least one segment per channel.
+    dtype : data-type, optional
+        Sample type of a raw binary file.
+    num_channels : int, optional
+        Number of channels of a raw binary file.
+
+    Returns:
+    frequencies : ndarray
+        Array of sample frequencies.
+    psd : ndarray
+        Power spectral density of each channel (channels x frequencies), or
+        one-dimensional for one-dimensional input.
+    """
+    if isinstance(source, str):
+        if source.endswith('.npy'):
+            source = np.load(source, mmap_mode='r')
+        else:
+            if dtype is None or num_channels is None:
+                raise ValueError("dtype and num_channels are required to read a raw binary file")
+            source = np.memmap(source, dtype=dtype, mode='r').reshape(num_channels, -1)
+
+    squeeze = np.ndim(source) == 1
+    if squeeze:
+        source = source[np.newaxis, :]
+
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if noverlap >= nperseg:
+        raise ValueError("noverlap must be less than nperseg.")
+    step = nperseg - noverlap
+    num_channels, num_samples = source.shape
+    if num_samples < nperseg:
+        raise ValueError("nperseg is larger than the number of samples")
+
+    window = signal.get_window('hann', nperseg)
+    total_segments = (num_samples - nperseg) // step + 1
+    samples_per_channel = block_size // num_channels
+    segments_per_block = max((samples_per_channel - nperseg) // step + 1, 1)
+
+    psd_sum = 0
+    for first in range(0, total_segments, segments_per_block):
+        last = min(first + segments_per_block, total_segments)
+        block = np.asarray(source[:, first * step:(last - 1) * step + nperseg], dtype=float)
+        segments = np.lib.stride_tricks.sliding_window_view(block, nperseg, axis=-1)[:, ::step, :]
+        psd_sum = psd_sum + _segment_periodograms(segments, fs, window).sum(axis=1)
+
+    frequencies = np.fft.rfftfreq(nperseg, d=1/fs)
+    psd = psd_sum / total_segments
+    return frequencies, (psd[0] if squeeze else psd)
+
+def stream_psd(blocks, fs, nperseg=256, noverlap=None, forgetting_factor=None):
+    """
+    Keep a running Welch PSD up to date from a stream of sample blocks.
+
+    Incoming samples are buffered; every time a full (overlapping) segment is
+    available its periodogram is folded into the running estimate, so each
+    block only costs the FFTs of the segments it completes instead of a full
+    Welch over the trailing window.
+
+    Parameters:
+    blocks : iterable of array_like
+        Blocks of samples, each one-dimensional or (channels x block samples),
+        e.g. a generator reading an acquisition ring buffer.
+    fs : float
+        Sampling frequency of the data.
+    nperseg : int, optional
+        Length of each segment for Welch's method.
+    noverlap : int, optional
+        Number of samples shared by consecutive segments (default: nperseg // 2).
+    forgetting_factor : float, optional
+        If given (0 < forgetting_factor <= 1), segments are averaged with
+        exponential forgetting, so the estimate tracks recent activity.
+        If None, all segments seen so far are averaged equally, which matches
+        calculate_psd over the whole stream.
+
+    Yields:
+    frequencies : ndarray
+        Array of sample frequencies.
+    psd : ndarray or None
+        Current PSD estimate (channels x frequencies) after each block, or
+        None until the first full segment has been received.
+    """
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if noverlap >= nperseg:
+        raise ValueError("noverlap must be less than nperseg.")
+    step = nperseg - noverlap
+    window = signal.get_window('hann', nperseg)
+    frequencies = np.fft.rfftfreq(nperseg, d=1/fs)
+
+    buffer = None
+    psd = None
+    num_segments = 0
+
+    for block in blocks:
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        buffer = block if buffer is None else np.concatenate((buffer, block), axis=-1)
+
+        if buffer.shape[-1] >= nperseg:
+            segments = np.lib.stride_tricks.sliding_window_view(buffer, nperseg, axis=-1)[:, ::step, :]
+            periodograms = _segment_periodograms(segments, fs, window)
+            new_segments = periodograms.shape[1]
+            buffer = buffer[:, new_segments * step:]
+
+            if forgetting_factor is None:
+                total = periodograms.sum(axis=1)
+                if psd is not None:
+                    total += psd * num_segments
+                num_segments += new_segments
+                psd = total / num_segments
+            else:
+                if psd is None:
+                    psd = periodograms[:, 0]
+                    periodograms = periodograms[:, 1:]
+                weights = forgetting_factor * (1 - forgetting_factor) ** np.arange(periodograms.shape[1] - 1, -1, -1)
+                psd = (1 - forgetting_factor) ** periodograms.shape[1] * psd + np.tensordot(periodograms, weights, axes=([1], [0]))
+                num_segments += new_segments
+
+        yield frequencies, psd
+
+def draw_psd(ax, frequencies, psd, channel_name=None):
+    """
+    Draw the Power Spectral Density on the given axes.
+
+    Parameters:
+    ax : matplotlib.axes.Axes
+        Axes to draw on.
+    frequencies : ndarray
+        Array of sample frequencies.
+    psd : ndarray
+        Power spectral density of data.
+    channel_name : str, optional
+        Name of the EEG channel (for title).
+    """
+    ax.semilogy(frequencies, psd)
+    if channel_name:
+        ax.set_title(f'PSD for Channel {channel_name}')
+    ax.set_xlabel('Frequency [Hz]')
+    ax.set_ylabel('PSD [V**2/Hz]')
+    ax.grid(True)
+
 def plot_psd(frequencies, psd, channel_name=None):
     """
     Plot the Power Spectral Density.
@@ -63,15 +263,10 @@ def plot_psd(frequencies, psd, channel_name=None):
         Name of the EEG channel (for title).
     """
     plt.figure()
-    plt.semilogy(frequencies, psd)
-    if channel_name:
-        plt.title(f'PSD for Channel {channel_name}')
-    plt.xlabel('Frequency [Hz]')
-    plt.ylabel('PSD [V**2/Hz]')
-    plt.grid(True)
+    draw_psd(plt.gca(), frequencies, psd, channel_name)
     plt.show()
 
-def process_eeg_data(eeg_data, fs, nperseg=1024):
+def process_eeg_data(eeg_data, fs, nperseg=1024, output_dir=None, montage=False, n_jobs=None):
     """
     Process EEG data to calculate and plot PSD for each channel.
 
@@ -82,9 +277,28 @@ def process_eeg_data(eeg_data, fs, nperseg=1024):
         Sampling frequency of the EEG data.
     nperseg : int, optional
         Length of each segment for Welch's method.
+    output_dir : str, optional
+        If given, figures are rendered headless (Agg) to this directory
+        instead of being shown.
+    montage : bool, optional
+        With output_dir, save one multi-panel montage instead of one image per channel.
+    n_jobs : int, optional
+        With output_dir, number of rendering workers (default: the package executor).
+
+    Returns:
+    frequencies : ndarray
+        Array of sample frequencies.
+    psd : ndarray
+        Power spectral density of each channel (channels x frequencies).
     """
-    for i in range(eeg_data.shape[0]):
-        channel_data = eeg_data[i, :]
-        frequencies, psd = calculate_psd(channel_data, fs, nperseg)
-        plot_psd(frequencies, psd, channel_name=f'Channel {i+1}')
+    frequencies, psd = calculate_psd(eeg_data, fs, nperseg)
+
+    if output_dir is not None:
+        panels = [(frequencies, psd[i], f'Channel {i+1}') for i in range(eeg_data.shape[0])]
+        render_panels(draw_psd, panels, output_dir, 'welch_psd', montage=montage, n_jobs=n_jobs)
+    else:
+        for i in range(eeg_data.shape[0]):
+            plot_psd(frequencies, psd[i], channel_name=f'Channel {i+1}')
+
+    return frequencies, psd
 